@@ -0,0 +1,241 @@
+"""Engine benchmark suite: perft, search speed and genetic player throughput.
+
+    perft    leaf counts through Board.get_valid_moves from fixed positions,
+             checked against the independent BitBoard move generator
+    search   nodes per second and time to reach every depth of an iterative
+             deepening search on a fixed position set
+    fitness  generate_possible_moves and calculate_fitness calls per second
+    batch    generate_moves_batch checked against Board move for move, and
+             calculate_fitness_batch against the original per-square loops,
+             over positions from random games with either side to move
+
+Positions come from a seeded random walk, so runs are comparable. Results
+are printed as JSON, or written to --output, to diff against earlier runs.
+
+    python benchmarks/engine.py --perft-depth 5 --search-depth 6 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.positions import sample_positions
+from checkers.bitboard import BitBoard
+from checkers.board import Board
+from checkers.constants import RED, WHITE
+from minmax.algorithm import search
+from minmax.ordering import MoveOrdering
+from minmax.stats import SearchStats
+from minmax.transposition import TranspositionTable
+
+PARTS = ['perft', 'search', 'fitness', 'batch']
+
+
+def positions(count):
+    # The start position with RED to move, then random positions with WHITE to move
+    return [(Board(), RED)] + [(board, WHITE) for board in sample_positions(count - 1)]
+
+
+def perft(board, color, depth):
+    if depth == 0:
+        return 1
+    opponent = WHITE if color == RED else RED
+    nodes = 0
+    for piece in board.get_all_pieces(color):
+        for (row, col), skip in list(board.get_valid_moves(piece).items()):
+            undo = board.make_move(piece, row, col, skip)
+            nodes += perft(board, opponent, depth - 1)
+            board.unmake_move(undo)
+    return nodes
+
+
+def bitboard_perft(position, color, depth):
+    if depth == 0:
+        return 1
+    opponent = WHITE if color == RED else RED
+    return sum(bitboard_perft(position.move(move), opponent, depth - 1) for move in position.get_moves(color))
+
+
+def run_perft(boards, depth):
+    results = []
+    for number, (board, color) in enumerate(boards):
+        expected = bitboard_perft(BitBoard.from_board(board), color, depth)
+        start = time.perf_counter()
+        nodes = perft(board, color, depth)
+        elapsed = time.perf_counter() - start
+        results.append({'position': number, 'depth': depth, 'nodes': nodes, 'seconds': elapsed,
+                        'nodes_per_second': nodes / elapsed, 'correct': nodes == expected})
+    return results
+
+
+def run_search(boards, depth):
+    results = []
+    for number, (board, color) in enumerate(boards):
+        # Same loop as iterative_deepening, timed after every depth
+        table = TranspositionTable()
+        ordering = MoveOrdering()
+        stats = SearchStats()
+        table.new_search()
+        start = time.perf_counter()
+        depths = []
+        for current in range(1, depth + 1):
+            search(board, current, float('-inf'), float('inf'), color == WHITE, table, 0, None, ordering, stats)
+            depths.append({'depth': current, 'seconds': time.perf_counter() - start, 'nodes': stats.nodes})
+        elapsed = time.perf_counter() - start
+        results.append({'position': number, 'nodes': stats.nodes, 'quiescence_nodes': stats.quiescence_nodes,
+                        'seconds': elapsed, 'nodes_per_second': stats.nodes / elapsed, 'time_to_depth': depths})
+    return results
+
+
+def run_fitness(boards, repeat):
+    import numpy as np
+    from genetic.genetic_algo import generate_possible_moves, calculate_fitness, calculate_fitness_batch
+
+    arrays = [board.to_array() for board, _ in boards]
+
+    start = time.perf_counter()
+    candidates = []
+    for _ in range(repeat):
+        for array in arrays:
+            candidates.append((generate_possible_moves(array), array))
+    generate_seconds = time.perf_counter() - start
+    scored = sum(len(moves) for moves, _ in candidates)
+
+    start = time.perf_counter()
+    for moves, array in candidates:
+        for move in moves:
+            calculate_fitness(move[2], array)
+    fitness_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for moves, array in candidates:
+        if moves:
+            calculate_fitness_batch(np.stack([move[2] for move in moves]), array)
+    batch_seconds = time.perf_counter() - start
+
+    return {'generate_calls': len(candidates), 'generate_seconds': generate_seconds,
+            'generate_per_second': len(candidates) / generate_seconds,
+            'fitness_calls': scored, 'fitness_seconds': fitness_seconds,
+            'fitness_per_second': scored / fitness_seconds,
+            'batch_boards_per_second': scored / batch_seconds}
+
+
+def loop_fitness(board, original_board):
+    # calculate_fitness as it was before calculate_fitness_batch, kept here as the reference
+    import numpy as np
+
+    ai_piece = 1
+    opponent_piece = -1
+    fitness = (np.sum(original_board == opponent_piece) - np.sum(board == opponent_piece)) * 10
+    rows, cols = board.shape
+    for i in range(rows):
+        for j in range(cols):
+            if board[i, j] != ai_piece:
+                continue
+            fitness += rows - i
+            if 2 <= i <= 5 and 2 <= j <= 5:
+                fitness += 2
+            for di, dj in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
+                if 0 <= i + di < rows and 0 <= j + dj < cols:
+                    if board[i + di, j + dj] == opponent_piece:
+                        if 0 <= i - di < rows and 0 <= j - dj < cols and board[i - di, j - dj] == 0:
+                            fitness -= 5
+                    elif board[i + di, j + dj] == 0:
+                        fitness += 1
+    return fitness
+
+
+def board_successors(board, color):
+    # {(from, to): resulting array} the way Board generates them
+    successors = {}
+    for piece in board.get_all_pieces(color):
+        start = (piece.row, piece.col)
+        for (row, col), skip in list(board.get_valid_moves(piece).items()):
+            undo = board.make_move(piece, row, col, skip)
+            successors[start, (row, col)] = board.to_array()
+            board.unmake_move(undo)
+    return successors
+
+
+def run_batch_check(count, seed=1):
+    import numpy as np
+    from genetic.genetic_algo import generate_moves_batch, calculate_fitness_batch
+
+    rng = random.Random(seed)
+    checked = moves = 0
+    move_mismatches = []
+    fitness_mismatches = []
+    start = time.perf_counter()
+    while checked < count:
+        board = Board()
+        color = RED
+        for _ in range(rng.randrange(60)):
+            if checked == count or board.winner(color) is not None:
+                break
+            array = board.to_array()
+            side = 1 if color == WHITE else -1
+            boards, sources, targets = generate_moves_batch(array, side)
+            batch = {(tuple(source), tuple(target)): result
+                     for source, target, result in zip(sources.tolist(), targets.tolist(), boards)}
+            expected = board_successors(board, color)
+            if batch.keys() != expected.keys() or any(not np.array_equal(batch[key], expected[key]) for key in expected):
+                move_mismatches.append(board.board_to_string())
+            if len(boards):
+                scores = calculate_fitness_batch(boards, array)
+                if any(score != loop_fitness(result, array) for score, result in zip(scores.tolist(), boards)):
+                    fitness_mismatches.append(board.board_to_string())
+            checked += 1
+            moves += len(expected)
+            board.make_move(*rng.choice(board.legal_moves(color)))
+            color = WHITE if color == RED else RED
+    return {'positions': checked, 'moves': moves, 'seconds': time.perf_counter() - start,
+            'move_mismatches': move_mismatches, 'fitness_mismatches': fitness_mismatches,
+            'correct': not move_mismatches and not fitness_mismatches}
+
+
+def run(parts, count, perft_depth, search_depth, repeat, check_positions):
+    boards = positions(count)
+    results = {'python': platform.python_version(), 'positions': count}
+    if 'perft' in parts:
+        results['perft'] = run_perft(boards, perft_depth)
+    if 'search' in parts:
+        results['search'] = run_search(boards, search_depth)
+    if 'fitness' in parts:
+        results['fitness'] = run_fitness(boards, repeat)
+    if 'batch' in parts:
+        results['batch'] = run_batch_check(check_positions)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--parts', nargs='+', choices=PARTS, default=PARTS)
+    parser.add_argument('--positions', type=int, default=6)
+    parser.add_argument('--perft-depth', type=int, default=5)
+    parser.add_argument('--search-depth', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=20, help='passes over the positions for the fitness part')
+    parser.add_argument('--check-positions', type=int, default=2000, help='positions for the batch part')
+    parser.add_argument('--output', help='write the JSON here instead of printing it')
+    args = parser.parse_args()
+
+    results = run(args.parts, args.positions, args.perft_depth, args.search_depth, args.repeat, args.check_positions)
+    if args.output:
+        with open(args.output, 'w') as out:
+            json.dump(results, out, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    failed = [result['position'] for result in results.get('perft', []) if not result['correct']]
+    if failed:
+        sys.exit('perft mismatch against BitBoard for positions %s' % failed)
+    if 'batch' in results and not results['batch']['correct']:
+        sys.exit('batch move generation or fitness differs from Board for %d positions'
+                 % len(set(results['batch']['move_mismatches'] + results['batch']['fitness_mismatches'])))
+
+
+if __name__ == '__main__':
+    main()
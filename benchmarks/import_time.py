@@ -0,0 +1,60 @@
+"""Cold import time of the headless engine.
+
+Every run is a fresh interpreter, the way a process-pool worker starts. The
+script fails if the engine pulls in pygame or numpy, or if the median import
+time goes over --max-ms.
+
+    python benchmarks/import_time.py --runs 20 --max-ms 50
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENGINE_MODULES = ['checkers.board', 'checkers.bitboard', 'minmax.algorithm']
+HEAVY_MODULES = ['pygame', 'numpy']
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+
+def measure(runs, modules=ENGINE_MODULES):
+    code = PROBE.format(imports='\n'.join('import ' + module for module in modules), heavy=HEAVY_MODULES)
+    times = []
+    loaded = set()
+    # A neutral CWD makes sure nothing depends on being started from the repo root
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=os.path.expanduser('~'),
+                                         env=dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE='1'))
+        result = json.loads(output)
+        times.append(result['ms'])
+        loaded.update(result['loaded'])
+    return {'modules': modules, 'runs': runs, 'median_ms': statistics.median(times),
+            'min_ms': min(times), 'max_ms': max(times), 'heavy_modules_loaded': sorted(loaded)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, default=None)
+    args = parser.parse_args()
+
+    result = measure(args.runs)
+    print(json.dumps(result, indent=2))
+    if result['heavy_modules_loaded']:
+        sys.exit('engine imported ' + ', '.join(result['heavy_modules_loaded']))
+    if args.max_ms is not None and result['median_ms'] > args.max_ms:
+        sys.exit('median import time %.1f ms is over %.1f ms' % (result['median_ms'], args.max_ms))
+
+
+if __name__ == '__main__':
+    main()
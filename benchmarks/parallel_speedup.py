@@ -0,0 +1,62 @@
+"""Speedup of the parallel root-split search over the serial one.
+
+Searches a fixed set of positions at one depth with the serial minimax and
+with ParallelSearch for 1..N workers, checks that every run picks the same
+move as the serial search and prints the timings as JSON. Both sides start
+every position with an empty transposition table and move cache.
+
+    python benchmarks/parallel_speedup.py --depth 6 --workers 4
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.positions import sample_positions
+from checkers.board import move_cache
+from minmax.algorithm import search
+from minmax.ordering import MoveOrdering, move_key
+from minmax.parallel import ParallelSearch
+from minmax.transposition import TranspositionTable
+
+
+def run(depth, max_workers, count):
+    positions = sample_positions(count)
+
+    start = time.perf_counter()
+    serial_moves = []
+    for position in positions:
+        move_cache.clear()
+        score, move = search(position, depth, float('-inf'), float('inf'), True,
+                             TranspositionTable(), 0, None, MoveOrdering())
+        serial_moves.append(move_key(move))
+    serial = time.perf_counter() - start
+
+    results = {'depth': depth, 'positions': count, 'serial_seconds': serial, 'parallel': []}
+    for workers in range(1, max_workers + 1):
+        with ParallelSearch(workers) as parallel:
+            start = time.perf_counter()
+            same = True
+            for position, expected in zip(positions, serial_moves):
+                score, move = parallel.search(position, depth, True)
+                same = same and move_key(move) == expected
+            elapsed = time.perf_counter() - start
+        results['parallel'].append({'workers': workers, 'seconds': elapsed,
+                                    'speedup': serial / elapsed, 'same_moves': same})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--depth', type=int, default=6)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--positions', type=int, default=8)
+    args = parser.parse_args()
+    print(json.dumps(run(args.depth, args.workers, args.positions), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Micro-benchmark of Piece: memory and the cost of moving and copying.
+
+Compares Piece with a copy of the old dict-based class that recomputed its
+pixel position on every move, and measures what the search does with whole
+boards: deepcopy and make_move/unmake_move. Prints JSON.
+
+    python benchmarks/pieces.py --number 200000
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+from copy import deepcopy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checkers.board import Board
+from checkers.constants import RED, SQUARE_SIZE
+from checkers.piece import Piece
+
+
+class DictPiece:
+    # Piece as it was before __slots__, kept here as the baseline
+    def __init__(self, row, col, color):
+        self.row = row
+        self.col = col
+        self.color = color
+        self.king = False
+        self.x = 0
+        self.y = 0
+        self.calc_pos()
+
+    def calc_pos(self):
+        self.x = SQUARE_SIZE * self.col + SQUARE_SIZE // 2
+        self.y = SQUARE_SIZE * self.row + SQUARE_SIZE // 2
+
+    def move(self, row, col):
+        self.row = row
+        self.col = col
+        self.calc_pos()
+
+
+def allocated(make, count=1000):
+    # Bytes per object, measured over count of them
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [make() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+
+def piece_results(cls, number):
+    piece = cls(5, 0, RED)
+    return {'bytes': allocated(lambda: cls(5, 0, RED), 10000),
+            'move_ns': timeit.timeit(lambda: piece.move(4, 1), number=number) / number * 1e9,
+            'deepcopy_us': timeit.timeit(lambda: deepcopy(piece), number=number // 10) / (number // 10) * 1e6}
+
+
+def board_results(number):
+    board = Board()
+    piece = board.get_piece(5, 0)
+    skip = []
+
+    def make_unmake():
+        board.unmake_move(board.make_move(piece, 4, 1, skip))
+
+    copies = number // 100
+    return {'deepcopy_bytes': allocated(lambda: deepcopy(board), 100),
+            'deepcopy_us': timeit.timeit(lambda: deepcopy(board), number=copies) / copies * 1e6,
+            'make_unmake_us': timeit.timeit(make_unmake, number=number) / number * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=200000, help='repetitions of the fast operations')
+    args = parser.parse_args()
+    results = {'piece': piece_results(Piece, args.number), 'dict_piece': piece_results(DictPiece, args.number),
+               'board': board_results(args.number)}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+import random
+
+from checkers.board import Board
+from checkers.constants import RED, WHITE
+from minmax.algorithm import iter_moves
+
+
+def sample_positions(count, seed=1, plies=(6, 20)):
+    # Positions reached by random play from the start, with WHITE (the AI) to move
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = Board()
+        color = RED
+        for _ in range(rng.randrange(*plies) | 1):
+            moves = list(iter_moves(board, color))
+            if not moves:
+                break
+            board.make_move(*rng.choice(moves))
+            color = WHITE if color == RED else RED
+        if color == WHITE and board.winner() is None:
+            positions.append(board)
+    return positions
@@ -0,0 +1,231 @@
+from .constants import ROWS, COLS, RED, WHITE
+from .piece import Piece
+from . import zobrist, evaluation
+
+# The 32 playable squares are packed into a 35 bit layout with a ghost bit
+# after every second row (bits 8, 17 and 26). With the ghosts in place every
+# diagonal step is a plain shift by 4 or 5, and steps that would wrap around
+# the edge land on a ghost bit or outside the board and are masked away.
+
+def bit_index(row, col):
+    return (row // 2) * 9 + (row % 2) * 4 + col // 2
+
+SQUARES = [(row, col) for row in range(ROWS) for col in range(COLS) if col % 2 == (row + 1) % 2]
+BITS = {square: 1 << bit_index(*square) for square in SQUARES}
+SQUARE_OF = {bit: square for square, bit in BITS.items()}
+
+VALID = 0
+for _bit in BITS.values():
+    VALID |= _bit
+
+TOP_ROW = 0
+BOTTOM_ROW = 0
+for (_row, _col), _bit in BITS.items():
+    if _row == 0:
+        TOP_ROW |= _bit
+    elif _row == ROWS - 1:
+        BOTTOM_ROW |= _bit
+PROMOTION = TOP_ROW | BOTTOM_ROW
+
+# Same order Board.get_valid_moves uses: up-left, up-right, down-left, down-right
+UP = (-5, -4)
+DOWN = (4, 5)
+
+
+def shift(mask, step):
+    if step > 0:
+        return (mask << step) & VALID
+    return (mask >> -step) & VALID
+
+
+def bits(mask):
+    while mask:
+        bit = mask & -mask
+        yield bit
+        mask ^= bit
+
+
+def count(mask):
+    return bin(mask).count('1')
+
+
+class BitBoard:
+    __slots__ = ('red', 'white', 'kings')
+
+    def __init__(self, red=0, white=0, kings=0):
+        self.red = red
+        self.white = white
+        self.kings = kings
+
+    @classmethod
+    def initial(cls):
+        red = white = 0
+        for (row, col), bit in BITS.items():
+            if row < 3:
+                white |= bit
+            elif row > 4:
+                red |= bit
+        return cls(red, white, 0)
+
+    @classmethod
+    def from_board(cls, board):
+        red = white = kings = 0
+        for row in board.board:
+            for piece in row:
+                if piece == 0:
+                    continue
+                bit = BITS[(piece.row, piece.col)]
+                if piece.color == RED:
+                    red |= bit
+                else:
+                    white |= bit
+                if piece.king:
+                    kings |= bit
+        return cls(red, white, kings)
+
+    def to_board(self, turn=RED):
+        from .board import Board
+
+        board = Board()
+        board.board = [[0] * COLS for _ in range(ROWS)]
+        for bit in bits(self.red | self.white):
+            row, col = SQUARE_OF[bit]
+            piece = Piece(row, col, RED if bit & self.red else WHITE)
+            if bit & self.kings:
+                piece.make_king()
+            board.board[row][col] = piece
+        board.red_left = count(self.red)
+        board.white_left = count(self.white)
+        board.red_kings = count(self.red & self.kings)
+        board.white_kings = count(self.white & self.kings)
+        board.hash = zobrist.hash_board(board.board)
+        board.score = evaluation.score_board(board.board)
+        board.start_history(turn)
+        return board
+
+    def copy(self):
+        return BitBoard(self.red, self.white, self.kings)
+
+    def key(self):
+        return self.red, self.white, self.kings
+
+    def __eq__(self, other):
+        return isinstance(other, BitBoard) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return self.to_string()
+
+    def to_string(self):
+        cells = []
+        for row in range(ROWS):
+            for col in range(COLS):
+                bit = BITS.get((row, col), 0)
+                if not bit & (self.red | self.white):
+                    cells.append('0')
+                elif bit & self.red:
+                    cells.append('R' if bit & self.kings else 'r')
+                else:
+                    cells.append('W' if bit & self.kings else 'w')
+        return ''.join(cells)
+
+    def pieces(self, color):
+        return self.red if color == RED else self.white
+
+    def empty(self):
+        return VALID & ~(self.red | self.white)
+
+    def _directions(self, color):
+        men = self.pieces(color) & ~self.kings
+        kings = self.pieces(color) & self.kings
+        # (step, pieces that may step that way) in Board.get_valid_moves order
+        up_movers = men | kings if color == RED else kings
+        down_movers = men | kings if color == WHITE else kings
+        return [(step, up_movers) for step in UP] + [(step, down_movers) for step in DOWN]
+
+    def get_moves(self, color):
+        """Every legal move for color as (source bit, destination bit, captured mask).
+
+        Captures are optional and a multi-jump keeps its vertical direction,
+        with every landing square being a move of its own, exactly like
+        Board.get_valid_moves.
+        """
+        own = self.pieces(color)
+        opponent = self.white if color == RED else self.red
+        empty = self.empty()
+        directions = self._directions(color)
+
+        moves = []
+        jumpers = 0
+        for step, movers in directions:
+            targets = shift(movers, step) & empty
+            for target in bits(targets):
+                moves.append((shift(target, -step), target, 0))
+            jumpers |= shift(shift(shift(movers, step) & opponent, step) & empty, -2 * step)
+
+        for source in bits(jumpers & own):
+            landings = {}
+            for step, movers in directions:
+                if source & movers:
+                    self._jumps(source, step, 0, opponent, empty, landings)
+            for target, captured in landings.items():
+                moves.append((source, target, captured))
+        return moves
+
+    def _jumps(self, source, step, captured, opponent, empty, landings):
+        middle = shift(source, step)
+        if not middle & opponent:
+            return
+        target = shift(middle, step)
+        if not target & empty:
+            return
+        captured |= middle
+        landings[target] = captured
+        # Continue in the same vertical direction, left before right
+        for next_step in (UP if step < 0 else DOWN):
+            self._jumps(target, next_step, captured, opponent, empty, landings)
+
+    def has_moves(self, color):
+        opponent = self.white if color == RED else self.red
+        empty = self.empty()
+        for step, movers in self._directions(color):
+            if shift(movers, step) & empty:
+                return True
+            if shift(shift(movers, step) & opponent, step) & empty:
+                return True
+        return False
+
+    def move(self, move):
+        """Return the position after move, promoting on the back ranks like Board.move."""
+        source, target, captured = move
+        red, white, kings = self.red, self.white, self.kings
+        if source & red:
+            red = (red ^ source) | target
+        else:
+            white = (white ^ source) | target
+        if source & kings:
+            kings = (kings ^ source) | target
+        elif target & PROMOTION:
+            kings |= target
+        red &= ~captured
+        white &= ~captured
+        kings &= ~captured
+        return BitBoard(red, white, kings)
+
+    def winner(self):
+        if not self.red:
+            return WHITE
+        if not self.white:
+            return RED
+        if not self.has_moves(RED):
+            return WHITE
+        if not self.has_moves(WHITE):
+            return RED
+        return None
+
+
+def move_to_squares(move):
+    source, target, captured = move
+    return SQUARE_OF[source], SQUARE_OF[target], [SQUARE_OF[bit] for bit in bits(captured)]
@@ -1,8 +1,12 @@
-import pygame
-from .constants import BLACK, ROWS, RED, SQUARE_SIZE, COLS, WHITE
+from .constants import ROWS, RED, COLS, WHITE
 from .piece import Piece
-from collections import defaultdict
-import numpy as np
+from . import zobrist, evaluation, encoding
+from .repetition import RepetitionTracker
+from .movecache import MoveCache
+
+# Legal moves of recently seen positions, keyed by (hash, color). An entry is
+# the full move list, or True when has_legal_moves only found that there is one.
+move_cache = MoveCache()
 
 class Board:
     def __init__(self):
@@ -10,10 +14,19 @@ class Board:
         self.red_left = self.white_left = 12
         self.red_kings = self.white_kings = 0
         self.create_board()
+        self.hash = zobrist.hash_board(self.board)
+        self.score = evaluation.score_board(self.board)
         self.move_count_without_capture = 0
-        self.previous_positions = []
+        self.start_history()
+
+    def start_history(self, color=RED):
+        # Positions seen so far, keyed by Zobrist hash and side to move
+        self.repetitions = RepetitionTracker()
+        self.repetitions.push(zobrist.position_key(self.hash, color))
 
-    def winner(self):
+    def winner(self, color=None):
+        # color is the side to move, if known: its moves are then generated in
+        # full and cached, so generating them again for the search is free
         # Check for all pieces captured
         if self.red_left <= 0:
             return WHITE
@@ -21,9 +34,11 @@ class Board:
             return RED
 
         # Check for no more moves
-        if not self.has_legal_moves(RED):
+        red_moves = self._moves(RED) if color == RED else self.has_legal_moves(RED)
+        if not red_moves:
             return WHITE
-        if not self.has_legal_moves(WHITE):
+        white_moves = self._moves(WHITE) if color == WHITE else self.has_legal_moves(WHITE)
+        if not white_moves:
             return RED
 
         # Check for stalemate (threefold repetition)
@@ -37,38 +52,79 @@ class Board:
         return None
 
     def has_legal_moves(self, color):
+        key = (self.hash, color)
+        cached = move_cache.get(key)
+        if cached is not None:
+            return bool(cached)
         for piece in self.get_all_pieces(color):
             if self.get_valid_moves(piece):
+                move_cache.put(key, True)
                 return True
+        move_cache.put(key, [])
         return False
 
+    def legal_moves(self, color):
+        # Every move of color as (piece, row, col, skip), in get_all_pieces and
+        # get_valid_moves order
+        board = self.board
+        return [(board[from_row][from_col], row, col, [board[r][c] for r, c in skip] if skip else [])
+                for from_row, from_col, row, col, skip in self._moves(color)]
+
+    def _moves(self, color):
+        # The cached moves as (from_row, from_col, row, col, skipped squares)
+        key = (self.hash, color)
+        cached = move_cache.get(key)
+        if cached is None or cached is True:
+            cached = []
+            for piece in self.get_all_pieces(color):
+                for (row, col), skip in self.get_valid_moves(piece).items():
+                    skip = tuple((skipped.row, skipped.col) for skipped in skip) if skip else ()
+                    cached.append((piece.row, piece.col, row, col, skip))
+            move_cache.put(key, cached)
+        return cached
+
     def is_stalemate(self):
-        current_position = self.board_to_string()
-        self.previous_positions.append(current_position)
-        if self.previous_positions.count(current_position) >= 3:
-            return True
-        return False
+        return self.repetitions.current_count() >= 3
 
     def board_to_string(self):
-        board_string = ''
-        for row in self.board:
-            for piece in row:
-                if piece == 0:
-                    board_string += '0'
-                elif piece.color == RED:
-                    board_string += 'r' if not piece.king else 'R'
-                elif piece.color == WHITE:
-                    board_string += 'w' if not piece.king else 'W'
-        return board_string
+        return encoding.to_string(self.to_packed())
+
+    def to_packed(self):
+        # 32 bytes, see checkers.encoding
+        return encoding.pack(self)
+
+    def from_packed(self, packed):
+        # Piece objects already on the board are reused rather than reallocated
+        spare = [piece for row in self.board for piece in row if piece != 0]
+        self.board = [[0] * COLS for _ in range(ROWS)]
+        self.red_left = self.white_left = self.red_kings = self.white_kings = 0
+        for row, col, color, king in encoding.pieces(packed):
+            piece = spare.pop() if spare else Piece(row, col, color)
+            piece.row, piece.col, piece.color, piece.king = row, col, color, king
+            self.board[row][col] = piece
+            if color == RED:
+                self.red_left += 1
+                self.red_kings += king
+            else:
+                self.white_left += 1
+                self.white_kings += king
+        self.hash = zobrist.hash_board(self.board)
+        self.score = evaluation.score_board(self.board)
+        self.start_history()
 
     def draw_squares(self, win):
-        win.fill(BLACK)
-        for row in range(ROWS):
-            for col in range(row % 2, COLS, 2):
-                pygame.draw.rect(win, RED, (row * SQUARE_SIZE, col * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
-
-    def evaluate(self):
-        return self.white_left - self.red_left + (self.white_kings * 0.5 - self.red_kings * 0.5)
+        from .render import draw_squares
+        draw_squares(win)
+
+    def evaluate(self, color=None):
+        # From WHITE's side. Material and piece-square terms are kept up to date
+        # by move and remove; color is the side to move, if the caller knows it
+        score = self.score
+        if evaluation.mobility:
+            score += evaluation.mobility * (len(self._moves(WHITE)) - len(self._moves(RED)))
+        if evaluation.tempo and color is not None:
+            score += evaluation.tempo if color == WHITE else -evaluation.tempo
+        return score / evaluation.SCALE
 
     def get_all_pieces(self, color):
         pieces = []
@@ -79,15 +135,19 @@ class Board:
         return pieces
 
     def move(self, piece, row, col):
+        self.hash ^= zobrist.piece_key(piece)
+        self.score -= evaluation.piece_score(piece)
         self.board[piece.row][piece.col], self.board[row][col] = self.board[row][col], self.board[piece.row][piece.col]
         piece.move(row, col)
 
-        if row == ROWS - 1 or row == 0:
+        if (row == ROWS - 1 or row == 0) and not piece.king:
             piece.make_king()
             if piece.color == WHITE:
                 self.white_kings += 1
             else:
                 self.red_kings += 1
+        self.hash ^= zobrist.piece_key(piece)
+        self.score += evaluation.piece_score(piece)
 
     def get_piece(self, row, col):
         return self.board[row][col]
@@ -107,21 +167,49 @@ class Board:
                     self.board[row].append(0)
 
     def draw(self, win):
-        self.draw_squares(win)
-        for row in range(ROWS):
-            for col in range(COLS):
-                piece = self.board[row][col]
-                if piece != 0:
-                    piece.draw(win)
+        from .render import draw_board
+        draw_board(win, self)
 
     def remove(self, pieces):
         for piece in pieces:
             self.board[piece.row][piece.col] = 0
             if piece != 0:
+                self.hash ^= zobrist.piece_key(piece)
+                self.score -= evaluation.piece_score(piece)
                 if piece.color == RED:
                     self.red_left -= 1
+                    if piece.king:
+                        self.red_kings -= 1
                 else:
                     self.white_left -= 1
+                    if piece.king:
+                        self.white_kings -= 1
+
+    def make_move(self, piece, row, col, skipped):
+        # Everything unmake_move needs to put the position back exactly
+        undo = (piece, piece.row, piece.col, piece.king, skipped,
+                self.red_left, self.white_left, self.red_kings, self.white_kings,
+                self.move_count_without_capture, self.hash, self.score)
+        self.move(piece, row, col)
+        if skipped:
+            self.remove(skipped)
+            self.move_count_without_capture = 0
+        else:
+            self.move_count_without_capture += 1
+        self.repetitions.push(zobrist.position_key(self.hash, WHITE if piece.color == RED else RED))
+        return undo
+
+    def unmake_move(self, undo):
+        (piece, row, col, king, skipped,
+         self.red_left, self.white_left, self.red_kings, self.white_kings,
+         self.move_count_without_capture, self.hash, self.score) = undo
+        self.board[piece.row][piece.col] = 0
+        self.board[row][col] = piece
+        piece.move(row, col)
+        piece.king = king
+        for captured in skipped:
+            self.board[captured.row][captured.col] = captured
+        self.repetitions.pop()
 
     def get_valid_moves(self, piece):
         moves = {}
@@ -155,9 +243,9 @@ class Board:
                     moves[(r, left)] = last
 
                 if last:
-                    row = max(r - 3, 0) if step == -1 else min(r + 3, ROWS)
-                    moves.update(self._traverse_left(r + step, row, step, color, left - 1, skipped=last))
-                    moves.update(self._traverse_right(r + step, row, step, color, left + 1, skipped=last))
+                    row = max(r - 3, -1) if step == -1 else min(r + 3, ROWS)
+                    moves.update(self._traverse_left(r + step, row, step, color, left - 1, skipped=last + skipped))
+                    moves.update(self._traverse_right(r + step, row, step, color, left + 1, skipped=last + skipped))
                 break
             elif current.color == color:
                 break
@@ -185,9 +273,9 @@ class Board:
                     moves[(r, right)] = last
 
                 if last:
-                    row = max(r - 3, 0) if step == -1 else min(r + 3, ROWS)
-                    moves.update(self._traverse_left(r + step, row, step, color, right - 1, skipped=last))
-                    moves.update(self._traverse_right(r + step, row, step, color, right + 1, skipped=last))
+                    row = max(r - 3, -1) if step == -1 else min(r + 3, ROWS)
+                    moves.update(self._traverse_left(r + step, row, step, color, right - 1, skipped=last + skipped))
+                    moves.update(self._traverse_right(r + step, row, step, color, right + 1, skipped=last + skipped))
                 break
             elif current.color == color:
                 break
@@ -213,29 +301,7 @@ class Board:
         print("\n")
 
     def to_array(self):
-        board_array = []
-        for row in self.board:
-            row_array = []
-            for piece in row:
-                if piece == 0:
-                    row_array.append(0)
-                else:
-                    if piece.color == WHITE:
-                        row_array.append(2 if piece.king else 1)
-                    else:
-                        row_array.append(-2 if piece.king else -1)
-            board_array.append(row_array)
-        return np.array(board_array)
+        return encoding.to_array(self.to_packed())
 
     def from_array(self, array):
-        for i in range(ROWS):
-            for j in range(COLS):
-                value = array[i][j]
-                if value == 0:
-                    self.board[i][j] = 0
-                else:
-                    color = WHITE if value > 0 else RED
-                    king = abs(value) == 2
-                    self.board[i][j] = Piece(i, j, color)
-                    if king:
-                        self.board[i][j].make_king()
+        self.from_packed(encoding.from_array(array))
@@ -0,0 +1,123 @@
+"""Packed board encoding.
+
+A position is 32 bytes, one per playable square in row-major order (the
+order of bitboard.SQUARES), each holding the signed value Board.to_array
+uses: 1 for a white man, 2 for a white king, -1 and -2 for red, 0 for
+empty. The bytes are hashable, compare equal for equal positions, and a
+stack of them is an N x 32 int8 NumPy array, so converting many positions
+at once is a few array operations.
+
+Strings are the 64 character form of Board.board_to_string: '0' for an
+empty square, 'r'/'R' for a red man/king and 'w'/'W' for white.
+
+NumPy is only imported by the functions that return or take arrays.
+"""
+import itertools
+from operator import itemgetter
+from .constants import ROWS, COLS, RED, WHITE
+
+SQUARES = [(row, col) for row in range(ROWS) for col in range(COLS) if col % 2 == (row + 1) % 2]
+FLAT = [row * COLS + col for row, col in SQUARES]
+SIZE = len(SQUARES)
+
+EMPTY = 0
+WHITE_MAN, WHITE_KING = 1, 2
+RED_MAN, RED_KING = -1 & 0xFF, -2 & 0xFF  # the int8 values as bytes
+
+_CHARS = {EMPTY: '0', WHITE_MAN: 'w', WHITE_KING: 'W', RED_MAN: 'r', RED_KING: 'R'}
+TO_CHAR = bytes(ord(_CHARS.get(value, '?')) for value in range(256))
+FROM_CHAR = bytes(next((value for value, char in _CHARS.items() if ord(char) == code), 0) for code in range(256))
+CODES = {WHITE: (WHITE_MAN, WHITE_KING), RED: (RED_MAN, RED_KING)}
+PER_ROW = COLS // 2
+_playable = itemgetter(*FLAT)
+
+# Every row of four codes as text and back, for rows starting with a light
+# square (even rows) and with a playable one (odd rows)
+ROW_TEXT = ({}, {})
+ROW_CODES = ({}, {})
+for _codes in itertools.product(_CHARS, repeat=PER_ROW):
+    _chars = [_CHARS[code] for code in _codes]
+    _rows = (''.join('0' + char for char in _chars), ''.join(char + '0' for char in _chars))
+    for _parity, _text in enumerate(_rows):
+        ROW_TEXT[_parity][bytes(_codes)] = _text
+        ROW_CODES[_parity][_text] = bytes(_codes)
+
+
+def pack(board):
+    """The packed encoding of a Board."""
+    squares = _playable([piece for row in board.board for piece in row])
+    return bytes([CODES[piece.color][piece.king] if piece else EMPTY for piece in squares])
+
+
+def pieces(packed):
+    # (row, col, color, king) for every piece
+    for (row, col), code in zip(SQUARES, packed):
+        if code:
+            yield row, col, WHITE if code < 128 else RED, code in (WHITE_KING, RED_KING)
+
+
+def to_string(packed):
+    return ''.join([ROW_TEXT[row % 2][packed[row * PER_ROW:(row + 1) * PER_ROW]] for row in range(ROWS)])
+
+
+def from_string(string):
+    return b''.join([ROW_CODES[row % 2][string[row * COLS:(row + 1) * COLS]] for row in range(ROWS)])
+
+
+def to_array(packed, dtype='int8'):
+    """8 x 8 array with the values of Board.to_array."""
+    import numpy as np
+
+    board = np.zeros(ROWS * COLS, dtype=dtype)
+    board[FLAT] = np.frombuffer(packed, dtype=np.int8)
+    return board.reshape(ROWS, COLS)
+
+
+def from_array(array):
+    import numpy as np
+
+    return np.asarray(array).ravel()[FLAT].astype(np.int8).tobytes()
+
+
+def pack_arrays(arrays):
+    """N x 32 int8 array for a stack of N 8 x 8 boards (a single board gives 1 x 32)."""
+    import numpy as np
+
+    arrays = np.asarray(arrays)
+    return arrays.reshape(-1, ROWS * COLS)[:, FLAT].astype(np.int8)
+
+
+def unpack_arrays(packed, dtype='int8'):
+    """N x 8 x 8 boards from an N x 32 array, a list of packed positions or one of them."""
+    import numpy as np
+
+    if isinstance(packed, (bytes, bytearray)):
+        packed = np.frombuffer(packed, dtype=np.int8)
+    elif isinstance(packed, list):
+        packed = np.frombuffer(b''.join(packed), dtype=np.int8)
+    packed = np.asarray(packed).reshape(-1, SIZE)
+    boards = np.zeros((len(packed), ROWS * COLS), dtype=dtype)
+    boards[:, FLAT] = packed
+    return boards.reshape(-1, ROWS, COLS)
+
+
+def pack_strings(strings):
+    """N x 32 int8 array for N board strings."""
+    import numpy as np
+
+    encoded = np.frombuffer(''.join(strings).encode('ascii'), dtype=np.uint8).reshape(-1, ROWS * COLS)
+    table = np.frombuffer(FROM_CHAR, dtype=np.uint8)
+    return table[encoded[:, FLAT]].view(np.int8)
+
+
+def unpack_strings(packed):
+    """Board strings for an N x 32 array or a list of packed positions."""
+    import numpy as np
+
+    if isinstance(packed, list):
+        packed = np.frombuffer(b''.join(packed), dtype=np.int8)
+    packed = np.asarray(packed, dtype=np.int8).reshape(-1, SIZE)
+    chars = np.full((len(packed), ROWS * COLS), ord('0'), dtype=np.uint8)
+    chars[:, FLAT] = np.frombuffer(TO_CHAR, dtype=np.uint8)[packed.view(np.uint8)]
+    text = chars.tobytes().decode('ascii')
+    return [text[start:start + ROWS * COLS] for start in range(0, len(text), ROWS * COLS)]
@@ -0,0 +1,94 @@
+import json
+from .constants import ROWS, COLS
+from .zobrist import RED_MAN, RED_KING, WHITE_MAN, WHITE_KING, kind
+
+# Board.evaluate is material plus piece-square tables built from these
+# weights, all in units of a man:
+#   advancement  per row a man has moved up from its own back rank
+#   back_rank    per man still guarding its own back rank
+#   center       per piece on the middle four squares of the middle rows
+#   mobility     per legal move more than the opponent; costs a move
+#                generation per evaluation, unlike the other terms
+#   tempo        for the side to move, when the caller knows it
+DEFAULT_WEIGHTS = {
+    'man': 1.0,
+    'king': 1.5,
+    'advancement': 0.03,
+    'back_rank': 0.1,
+    'center': 0.05,
+    'mobility': 0.0,
+    'tempo': 0.0,
+}
+
+# Scores are kept as integers in 1/SCALE of a man, so updating them move by
+# move gives exactly the same number as adding them up from scratch
+SCALE = 1000
+
+CENTER = {(row, col) for row in (3, 4) for col in range(2, 6)}
+
+weights = dict(DEFAULT_WEIGHTS)
+tables = None
+mobility = 0
+tempo = 0
+
+
+def build_tables(weights):
+    # tables[kind][row][col], positive for WHITE and negative for RED
+    tables = [[[0] * COLS for _ in range(ROWS)] for _ in range(4)]
+    for row in range(ROWS):
+        for col in range(COLS):
+            for piece_kind in (RED_MAN, RED_KING, WHITE_MAN, WHITE_KING):
+                king = piece_kind in (RED_KING, WHITE_KING)
+                # WHITE starts at the top, RED at the bottom
+                rows_up = row if piece_kind in (WHITE_MAN, WHITE_KING) else ROWS - 1 - row
+                value = weights['king'] if king else weights['man']
+                if not king:
+                    value += weights['advancement'] * rows_up
+                    if rows_up == 0:
+                        value += weights['back_rank']
+                if (row, col) in CENTER:
+                    value += weights['center']
+                sign = -1 if piece_kind in (RED_MAN, RED_KING) else 1
+                tables[piece_kind][row][col] = sign * round(value * SCALE)
+    return tables
+
+
+def set_weights(new_weights):
+    """Use new_weights, missing names keep their default. Boards score their
+    pieces when created, so set this before creating the boards to evaluate."""
+    global weights, tables, mobility, tempo
+    unknown = set(new_weights) - set(DEFAULT_WEIGHTS)
+    if unknown:
+        raise ValueError('unknown evaluation weights: %s' % ', '.join(sorted(unknown)))
+    weights = dict(DEFAULT_WEIGHTS, **new_weights)
+    tables = build_tables(weights)
+    mobility = round(weights['mobility'] * SCALE)
+    tempo = round(weights['tempo'] * SCALE)
+    return weights
+
+
+def load_weights(path):
+    with open(path) as weights_file:
+        return set_weights(json.load(weights_file))
+
+
+def save_weights(path, weights):
+    with open(path, 'w') as weights_file:
+        json.dump(weights, weights_file, indent=4)
+        weights_file.write('\n')
+
+
+def piece_score(piece):
+    return tables[kind(piece)][piece.row][piece.col]
+
+
+def score_board(board):
+    score = 0
+    for row in board:
+        for piece in row:
+            if piece != 0:
+                score += piece_score(piece)
+    return score
+
+
+set_weights(DEFAULT_WEIGHTS)
@@ -1,22 +1,20 @@
-import pygame
-import numpy as np
-from .constants import RED, WHITE, BLUE, SQUARE_SIZE
+from .constants import RED, WHITE
 from .board import Board
-from collections import defaultdict
+from . import zobrist
+from .render import BoardRenderer
 
 class Game:
     def __init__(self, win):
         self._init()
         self.win = win
+        self.renderer = BoardRenderer()
         self.player_moves = 0
         self.ai_moves = 0
         self.moves_without_capture = 0  # Counter for moves without capture
-        self.move_history = []  # List to store move history for threefold repetition
 
     def update(self):
-        self.board.draw(self.win)
-        self.draw_valid_moves(self.valid_moves)
-        pygame.display.update()
+        # Returns the rects of self.win that changed; presenting them is up to the caller
+        return self.renderer.draw(self.win, self.board, self.valid_moves)
 
     def _init(self):
         self.selected = None
@@ -26,7 +24,7 @@ class Game:
         self.player_moves = 0
         self.ai_moves = 0
         self.moves_without_capture = 0  # Reset the counter
-        self.move_history = []  # Reset move history
+        self.repetitions = self.board.repetitions  # Shared with the board so the AI sees the game history
 
     def winner(self):
         # Check for all pieces captured
@@ -42,11 +40,8 @@ class Game:
             return RED
 
         # Check for threefold repetition
-        position_counts = defaultdict(int)
-        for pos in self.move_history:
-            position_counts[pos] += 1
-            if position_counts[pos] >= 3:
-                return "Draw due to threefold repetition"
+        if self.repetitions.current_count() >= 3:
+            return "Draw due to threefold repetition"
         
         # Check for the 10-move rule
         if self.moves_without_capture >= 30:
@@ -89,8 +84,9 @@ class Game:
             else:
                 self.ai_moves += 1
             
-            # Save board state to move history for threefold repetition
-            self.move_history.append(self.board_to_string())
+            # Record the position for threefold repetition
+            next_turn = WHITE if self.turn == RED else RED
+            self.repetitions.push(zobrist.position_key(self.board.hash, next_turn))
             
             # Print the current board state after the player's move
             self.print_board_as_array()
@@ -101,11 +97,6 @@ class Game:
 
         return True
 
-    def draw_valid_moves(self, moves):
-        for move in moves:
-            row, col = move
-            pygame.draw.circle(self.win, BLUE, (col * SQUARE_SIZE + SQUARE_SIZE // 2, row * SQUARE_SIZE + SQUARE_SIZE // 2), 15)
-
     def change_turn(self):
         self.valid_moves = {}
         self.turn = WHITE if self.turn == RED else RED
@@ -115,8 +106,9 @@ class Game:
 
     def ai_move(self, board):
         self.board = board
+        self.board.repetitions = self.repetitions  # Keep one history across board swaps
+        self.repetitions.push(zobrist.position_key(board.hash, RED))  # Record the position for threefold repetition
         self.ai_moves += 1  # Increment AI moves
-        self.move_history.append(self.board_to_string())  # Save board state to move history
     
         # Increment or reset move counter based on whether a capture occurred
         if self.board.move_count_without_capture >= 30:
@@ -128,25 +120,7 @@ class Game:
 
     def board_to_string(self):
         # Convert the board state to a string representation
-        board_string = ''
-        for row in self.board.board:
-            for piece in row:
-                if piece == 0:
-                    board_string += '0'
-                elif piece.color == RED:
-                    board_string += 'r' if not piece.king else 'R'
-                elif piece.color == WHITE:
-                    board_string += 'w' if not piece.king else 'W'
-        return board_string
+        return self.board.board_to_string()
 
     def print_board_as_array(self):
-        board_array = np.zeros((8, 8), dtype=int)
-        for i, row in enumerate(self.board.board):
-            for j, piece in enumerate(row):
-                if piece == 0:
-                    board_array[i, j] = 0
-                elif piece.color == RED:
-                    board_array[i, j] = -1 if not piece.king else -2
-                elif piece.color == WHITE:
-                    board_array[i, j] = 1 if not piece.king else 2
-        print(board_array)
+        print(self.board.to_array())
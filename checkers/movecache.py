@@ -0,0 +1,43 @@
+import threading
+from collections import OrderedDict
+
+
+class MoveCache:
+    """Bounded LRU of move generation results keyed by position.
+
+    Moves are stored as squares rather than Piece objects, so an entry is
+    valid for any Board with the same pieces on the same squares, including
+    copies and positions reached again by a different move order. Shared by
+    the game loop and the AI thread, hence the lock.
+    """
+
+    def __init__(self, size=8192):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
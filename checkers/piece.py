@@ -1,7 +1,10 @@
-from .constants import RED, WHITE, SQUARE_SIZE, GREY, CROWN
-import pygame
+from .constants import RED, WHITE
 
 class Piece:
+    # No __dict__: boards are copied and pieces moved thousands of times per
+    # search. Screen positions are worked out by checkers.render.
+    __slots__ = ('row', 'col', 'color', 'king')
+
     PADDING = 15
     OUTLINE = 2
 
@@ -10,28 +13,24 @@ class Piece:
         self.col = col
         self.color = color
         self.king = False
-        self.x = 0
-        self.y = 0
-        self.calc_pos()
-
-    def calc_pos(self):
-        self.x = SQUARE_SIZE * self.col + SQUARE_SIZE // 2
-        self.y = SQUARE_SIZE * self.row + SQUARE_SIZE // 2
 
     def make_king(self):
         self.king = True
     
     def draw(self, win):
-        radius = SQUARE_SIZE//2 - self.PADDING
-        pygame.draw.circle(win, GREY, (self.x, self.y), radius + self.OUTLINE)
-        pygame.draw.circle(win, self.color, (self.x, self.y), radius)
-        if self.king:
-            win.blit(CROWN, (self.x - CROWN.get_width()//2, self.y - CROWN.get_height()//2))
+        from .render import draw_piece
+        draw_piece(win, self)
 
     def move(self, row, col):
         self.row = row
         self.col = col
-        self.calc_pos()
+
+    def __deepcopy__(self, memo):
+        # Every field is immutable, so a shallow copy is a deep one
+        piece = Piece.__new__(Piece)
+        piece.row, piece.col, piece.color, piece.king = self.row, self.col, self.color, self.king
+        memo[id(self)] = piece
+        return piece
 
     def __repr__(self):
-        return str(self.color)
\ No newline at end of file
+        return str(self.color)
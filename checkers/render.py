@@ -0,0 +1,129 @@
+import os
+import pygame
+from .constants import BLACK, ROWS, RED, WHITE, SQUARE_SIZE, COLS, GREY, BLUE
+from .piece import Piece
+
+# Everything that needs pygame lives here, so the rules and search code can be
+# imported by headless workers without pygame or a display.
+
+CROWN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'crown.png')
+_crown = None
+
+def get_crown():
+    # Loaded on first use instead of at import time, and independent of the CWD
+    global _crown
+    if _crown is None:
+        _crown = pygame.transform.scale(pygame.image.load(CROWN_PATH), (44, 25))
+    return _crown
+
+class Sprites:
+    """Pre-rendered surfaces for one square size.
+
+    The checkerboard is drawn once into background and every piece kind,
+    keyed by (color, king), into a transparent square sized surface, so a
+    frame is only blits. Sizes are scaled from the SQUARE_SIZE the game was
+    drawn at, so any board size looks the same.
+    """
+
+    def __init__(self, square_size=SQUARE_SIZE):
+        self.square_size = square_size
+        scale = square_size / SQUARE_SIZE
+
+        self.background = pygame.Surface((COLS * square_size, ROWS * square_size))
+        self.background.fill(BLACK)
+        for row in range(ROWS):
+            for col in range(row % 2, COLS, 2):
+                self.background.fill(RED, (row * square_size, col * square_size, square_size, square_size))
+
+        center = (square_size // 2, square_size // 2)
+        radius = square_size // 2 - round(Piece.PADDING * scale)
+        crown = get_crown()
+        if scale != 1:
+            crown = pygame.transform.smoothscale(crown, (round(crown.get_width() * scale), round(crown.get_height() * scale)))
+        self.pieces = {}
+        for color in (RED, WHITE):
+            for king in (False, True):
+                sprite = pygame.Surface((square_size, square_size), pygame.SRCALPHA)
+                pygame.draw.circle(sprite, GREY, center, radius + Piece.OUTLINE)
+                pygame.draw.circle(sprite, color, center, radius)
+                if king:
+                    sprite.blit(crown, (center[0] - crown.get_width()//2, center[1] - crown.get_height()//2))
+                self.pieces[color, king] = sprite
+
+        self.marker = pygame.Surface((square_size, square_size), pygame.SRCALPHA)
+        pygame.draw.circle(self.marker, BLUE, center, round(15 * scale))
+
+_sprites = {}
+
+def get_sprites(square_size=SQUARE_SIZE):
+    # Built once per resolution
+    sprites = _sprites.get(square_size)
+    if sprites is None:
+        sprites = _sprites[square_size] = Sprites(square_size)
+    return sprites
+
+def square_rect(row, col, square_size=SQUARE_SIZE):
+    return pygame.Rect(col * square_size, row * square_size, square_size, square_size)
+
+def draw_squares(win, square_size=SQUARE_SIZE):
+    win.blit(get_sprites(square_size).background, (0, 0))
+
+def draw_piece(win, piece, square_size=SQUARE_SIZE):
+    win.blit(get_sprites(square_size).pieces[piece.color, piece.king], (piece.col * square_size, piece.row * square_size))
+
+def draw_board(win, board, square_size=SQUARE_SIZE):
+    draw_squares(win, square_size)
+    for row in range(ROWS):
+        for col in range(COLS):
+            piece = board.board[row][col]
+            if piece != 0:
+                draw_piece(win, piece, square_size)
+
+def draw_square(win, sprites, board, row, col, marked):
+    # One square with whatever stands on it, the same pixels draw_board
+    # produces there, with the move marker on top when marked
+    rect = square_rect(row, col, sprites.square_size)
+    win.blit(sprites.background, rect, rect)
+    piece = board.board[row][col]
+    if piece != 0:
+        win.blit(sprites.pieces[piece.color, piece.king], rect)
+    if marked:
+        win.blit(sprites.marker, rect)
+    return rect
+
+class BoardRenderer:
+    """Redraws only the squares that changed since the last frame.
+
+    draw() returns the rects it touched, so the caller can present just
+    those, and nothing at all when the board is unchanged. The square size
+    follows the surface drawn on, so a differently sized surface gets its
+    own sprites and a full redraw.
+    """
+
+    def __init__(self):
+        self.drawn = None
+        self.sprites = None
+
+    def invalidate(self):
+        # Force a full redraw, e.g. after something else painted over the surface
+        self.drawn = None
+
+    def draw(self, win, board, valid_moves):
+        square_size = min(win.get_width() // COLS, win.get_height() // ROWS)
+        if self.sprites is None or self.sprites.square_size != square_size:
+            self.sprites = get_sprites(square_size)
+            self.drawn = None
+
+        state = []
+        for row in range(ROWS):
+            for col in range(COLS):
+                piece = board.board[row][col]
+                state.append((None if piece == 0 else (piece.color, piece.king), (row, col) in valid_moves))
+
+        dirty = []
+        for index, square in enumerate(state):
+            if self.drawn is None or self.drawn[index] != square:
+                row, col = divmod(index, COLS)
+                dirty.append(draw_square(win, self.sprites, board, row, col, square[1]))
+        self.drawn = state
+        return dirty
@@ -0,0 +1,34 @@
+class RepetitionTracker:
+    """Counts how often each position key occurred along the current line.
+
+    push/pop are O(1), so the search can push every move it makes and pop
+    it again on undo without the searched positions ending up in the game
+    history.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.keys = []
+
+    def push(self, key):
+        self.keys.append(key)
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def pop(self):
+        key = self.keys.pop()
+        remaining = self.counts[key] - 1
+        if remaining:
+            self.counts[key] = remaining
+        else:
+            del self.counts[key]
+
+    def count(self, key):
+        return self.counts.get(key, 0)
+
+    def current_count(self):
+        if not self.keys:
+            return 0
+        return self.counts[self.keys[-1]]
+
+    def __len__(self):
+        return len(self.keys)
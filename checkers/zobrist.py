@@ -0,0 +1,34 @@
+import random
+from .constants import ROWS, COLS, RED
+
+# One random 64 bit key per square and piece kind, plus one for WHITE to move.
+# A fixed seed keeps hashes stable between runs and across worker processes.
+_random = random.Random(20240601)
+
+RED_MAN, RED_KING, WHITE_MAN, WHITE_KING = range(4)
+
+KEYS = [[[_random.getrandbits(64) for _ in range(4)] for _ in range(COLS)] for _ in range(ROWS)]
+SIDE = _random.getrandbits(64)
+
+
+def kind(piece):
+    if piece.color == RED:
+        return RED_KING if piece.king else RED_MAN
+    return WHITE_KING if piece.king else WHITE_MAN
+
+
+def piece_key(piece):
+    return KEYS[piece.row][piece.col][kind(piece)]
+
+
+def hash_board(board):
+    h = 0
+    for row in board:
+        for piece in row:
+            if piece != 0:
+                h ^= piece_key(piece)
+    return h
+
+
+def position_key(h, color_to_move):
+    return h ^ SIDE if color_to_move != RED else h
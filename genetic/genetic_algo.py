@@ -1,191 +1,251 @@
 import numpy as np
 import random
+import time
+
+DIAGONALS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]  # same order as Board.get_valid_moves
+OFF_BOARD = 99  # padding value that is neither empty nor a piece
+MAX_JUMPS = 4  # a jump chain keeps its vertical direction, so at most 3 fit on the board
 
 # Function to generate all possible moves for the AI pieces, including captures
 def generate_possible_moves(board_state, ai_piece=1, opponent_piece=-1):
-    directions = [(-1, -1), (-1, 1), (1, -1), (1, 1)]  # Possible move directions
-    capture_directions = [(2 * d[0], 2 * d[1]) for d in directions]  # Capture move directions
-
-    def is_within_bounds(x, y):
-        return 0 <= x < board_state.shape[0] and 0 <= y < board_state.shape[1]
-
-    possible_moves = []
-
-    for i in range(board_state.shape[0]):
-        for j in range(board_state.shape[1]):
-            if board_state[i, j] == ai_piece:
-                # Check for normal moves
-                for direction in directions:
-                    new_i, new_j = i + direction[0], j + direction[1]
-                    if is_within_bounds(new_i, new_j) and board_state[new_i, new_j] == 0:
-                        new_board = board_state.copy()
-                        new_board[i, j] = 0
-                        new_board[new_i, new_j] = ai_piece
-                        move = ((i, j), (new_i, new_j), new_board)
-                        possible_moves.append(move)
-                # Check for capture moves
-                for capture_direction in capture_directions:
-                    mid_i, mid_j = i + capture_direction[0] // 2, j + capture_direction[1] // 2
-                    new_i, new_j = i + capture_direction[0], j + capture_direction[1]
-                    if (
-                        is_within_bounds(mid_i, mid_j) and is_within_bounds(new_i, new_j) and
-                        board_state[mid_i, mid_j] == opponent_piece and board_state[new_i, new_j] == 0
-                    ):
-                        new_board = board_state.copy()
-                        new_board[i, j] = 0
-                        new_board[mid_i, mid_j] = 0
-                        new_board[new_i, new_j] = ai_piece
-                        move = ((i, j), (new_i, new_j), new_board)
-                        possible_moves.append(move)
-
-    return possible_moves
+    boards, sources, targets = generate_moves_batch(board_state, ai_piece)
+    return [(tuple(source), tuple(target), board) for source, target, board in zip(sources.tolist(), targets.tolist(), boards)]
+
+# All legal successors for side (1 = WHITE, -1 = RED) with the rules of
+# Board.get_valid_moves: men move forward only, kings both ways, captures are
+# optional and a multi-jump keeps its vertical direction, every landing square
+# being a move of its own. Returns the result boards stacked as N x 8 x 8 and
+# the from/to squares as N x 2 arrays.
+def generate_moves_batch(board_state, side=1):
+    board = np.asarray(board_state)
+    rows, cols = board.shape
+    padded = np.pad(board, 2, constant_values=OFF_BOARD)
+    men = board == side
+    kings = board == 2 * side
+
+    def at(r, c):
+        return padded[r + 2, c + 2]
+
+    def is_opponent(values):
+        return (values == -side) | (values == -2 * side)
+
+    src_r, src_c, dst_r, dst_c = [], [], [], []
+
+    # Simple moves, one shifted view per direction
+    for dr, dc in DIAGONALS:
+        movers = men | kings if dr == side else kings
+        ahead = padded[2 + dr:2 + dr + rows, 2 + dc:2 + dc + cols]
+        r, c = np.nonzero(movers & (ahead == 0))
+        src_r.append(r)
+        src_c.append(c)
+        dst_r.append(r + dr)
+        dst_c.append(c + dc)
+    simple = sum(len(r) for r in src_r)
+
+    # Jumps, extending every open chain by one capture per round. order is the
+    # chain's position in Board's depth-first traversal, so when two chains
+    # reach the same square the one Board would keep can be picked below.
+    jumps = []
+    for index, (dr, dc) in enumerate(DIAGONALS):
+        movers = men | kings if dr == side else kings
+        r, c = np.nonzero(movers)
+        frontier = (r, c, r, c, np.zeros((len(r), rows, cols), dtype=bool), np.full(len(r), index + 1))
+        steps = [dc]
+        level = 1
+        while len(frontier[0]):
+            start_r, start_c, cur_r, cur_c, captured, order = frontier
+            extended = []
+            for choice, step in enumerate(steps):
+                ok = is_opponent(at(cur_r + dr, cur_c + step)) & (at(cur_r + 2 * dr, cur_c + 2 * step) == 0)
+                k = np.nonzero(ok)[0]
+                taken = captured[k].copy()
+                taken[np.arange(len(k)), cur_r[k] + dr, cur_c[k] + step] = True
+                digit = order[k] if level == 1 else order[k] * 5 + choice + 1
+                extended.append((start_r[k], start_c[k], cur_r[k] + 2 * dr, cur_c[k] + 2 * step, taken, digit))
+            frontier = tuple(np.concatenate(parts) for parts in zip(*extended))
+            jumps.append(frontier + (frontier[5] * 5 ** (MAX_JUMPS - level),))
+            steps = [-1, 1]
+            level += 1
+
+    if jumps:
+        start_r, start_c, end_r, end_c, captured, _, order = (np.concatenate(parts) for parts in zip(*jumps))
+        # Keep the chain Board's depth-first traversal writes last for each from/to pair
+        code = ((start_r * cols + start_c) * rows + end_r) * cols + end_c
+        ranked = np.lexsort((order, code))
+        last = np.ones(len(ranked), dtype=bool)
+        last[:-1] = code[ranked][1:] != code[ranked][:-1]
+        keep = ranked[last]
+        src_r.append(start_r[keep])
+        src_c.append(start_c[keep])
+        dst_r.append(end_r[keep])
+        dst_c.append(end_c[keep])
+        captured = captured[keep]
+    else:
+        captured = np.zeros((0, rows, cols), dtype=bool)
+
+    src_r, src_c, dst_r, dst_c = (np.concatenate(parts).astype(int) for parts in (src_r, src_c, dst_r, dst_c))
+    n = len(src_r)
+    boards = np.repeat(board[np.newaxis], n, axis=0)
+    moves = np.arange(n)
+    pieces = board[src_r, src_c]
+    # Promote on either back rank, like Board.move
+    promoted = (np.abs(pieces) == 1) & ((dst_r == 0) | (dst_r == rows - 1))
+    pieces = np.where(promoted, 2 * np.sign(pieces), pieces)
+    boards[moves, src_r, src_c] = 0
+    boards[simple:][captured] = 0
+    boards[moves, dst_r, dst_c] = pieces
+    return boards, np.stack([src_r, src_c], axis=1), np.stack([dst_r, dst_c], axis=1)
+
 
 # Function to calculate fitness of a move
 def calculate_fitness(board, original_board):
+    return calculate_fitness_batch(board[np.newaxis], original_board)[0]
+
+# Fitness of a whole stack of candidate boards (N x 8 x 8) at once, same scores as
+# scoring them one by one. Neighbours are read from a padded copy shifted one step
+# along each diagonal, so squares off the edge never count as empty or as pieces.
+def calculate_fitness_batch(boards, original_board):
     ai_piece = 1
     opponent_piece = -1
-    fitness = 0
+    rows, cols = boards.shape[1], boards.shape[2]
 
     # 1. Capturing Opponent Pieces
     original_opponent_pieces = np.sum(original_board == opponent_piece)
-    new_opponent_pieces = np.sum(board == opponent_piece)
-    captured_pieces = original_opponent_pieces - new_opponent_pieces
-    fitness += captured_pieces * 10
-
-    # 2. Improving Position
-    for i in range(board.shape[0]):
-        for j in range(board.shape[1]):
-            if board[i, j] == ai_piece:
-                # Moving closer to becoming a king
-                fitness += (board.shape[0] - i) * 1
-                # Control the center
-                if 2 <= i <= 5 and 2 <= j <= 5:
-                    fitness += 2
-
-    # 3. Avoiding Capture
-    for i in range(board.shape[0]):
-        for j in range(board.shape[1]):
-            if board[i, j] == ai_piece:
-                for di, dj in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-                    if 0 <= i + di < board.shape[0] and 0 <= j + dj < board.shape[1]:
-                        if board[i + di, j + dj] == opponent_piece:
-                            if 0 <= i - di < board.shape[0] and 0 <= j - dj < board.shape[1] and board[i - di, j - dj] == 0:
-                                fitness -= 5
-
-    # 4. Mobility
-    for i in range(board.shape[0]):
-        for j in range(board.shape[1]):
-            if board[i, j] == ai_piece:
-                for di, dj in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-                    if 0 <= i + di < board.shape[0] and 0 <= j + dj < board.shape[1]:
-                        if board[i + di, j + dj] == 0:
-                            fitness += 1
+    new_opponent_pieces = np.sum(boards == opponent_piece, axis=(1, 2))
+    fitness = (original_opponent_pieces - new_opponent_pieces) * 10
+
+    ai = boards == ai_piece
+
+    # 2. Improving Position: moving closer to becoming a king and controlling the center
+    advancement = (rows - np.arange(rows))[np.newaxis, :, np.newaxis]
+    fitness = fitness + np.sum(ai * advancement, axis=(1, 2))
+    fitness = fitness + 2 * np.sum(ai[:, 2:6, 2:6], axis=(1, 2))
+
+    padded = np.pad(boards, ((0, 0), (1, 1), (1, 1)), constant_values=OFF_BOARD)
+    for di, dj in DIAGONALS:
+        ahead = padded[:, 1 + di:rows + 1 + di, 1 + dj:cols + 1 + dj]
+        behind = padded[:, 1 - di:rows + 1 - di, 1 - dj:cols + 1 - dj]
+        # 3. Avoiding Capture
+        fitness = fitness - 5 * np.sum(ai & (ahead == opponent_piece) & (behind == 0), axis=(1, 2))
+        # 4. Mobility
+        fitness = fitness + np.sum(ai & (ahead == 0), axis=(1, 2))
 
     return fitness
 
-# Rank Selection
-def rank_selection(moves_with_fitness, num_selections):
-    # Sort moves based on fitness
+# Rank Selection: the best of n gets rank n, the worst rank 1, and each is
+# picked with probability proportional to its rank
+def rank_selection(moves_with_fitness, num_selections, rng=random):
     sorted_moves = sorted(moves_with_fitness, key=lambda x: x[1], reverse=True)
-    total_rank = sum(range(1, len(sorted_moves) + 1))
-    rank_probabilities = [(rank + 1) / total_rank for rank in range(len(sorted_moves))]
-    
-    # Create cumulative probability distribution
-    cumulative_probabilities = np.cumsum(rank_probabilities)
-
-    # Select moves based on rank probabilities
-    selected_moves = []
-    for _ in range(num_selections):
-        r = random.random()
-        for i, cumulative_probability in enumerate(cumulative_probabilities):
-            if r <= cumulative_probability:
-                selected_moves.append(sorted_moves[i][0])
-                break
-
-    return selected_moves
-
-# Function to perform crossover between two binary strings
-def crossover_binary(bin1, bin2):
-    crossover_point = random.randint(1, len(bin1) - 1)
-    offspring1 = bin1[:crossover_point] + bin2[crossover_point:]
-    offspring2 = bin2[:crossover_point] + bin1[crossover_point:]
-    return offspring1, offspring2
-
-# Function to perform mutation on a binary string
-def mutate_binary(bin_str, mutation_rate=0.01):
-    bin_list = list(bin_str)
-    for i in range(len(bin_list)):
-        if random.random() < mutation_rate:
-            bin_list[i] = '1' if bin_list[i] == '0' else '0'
-    return ''.join(bin_list)
-
-# Main genetic algorithm function
-def genetic_algorithm_move(board_state):
-    best_move = None
-    best_fitness = float('-inf')
-
-    iterations = 0
-    max_iterations = 20
-
-    while iterations < max_iterations:
-        iterations += 1
-
-        # Generate possible moves
-        possible_moves = generate_possible_moves(board_state)
-
-        # Check if there are no possible moves
-        if not possible_moves:
-            print("No possible moves available. Terminating.")
-            break
-
-        # Check if there is only one possible move
-        if len(possible_moves) == 1:
-            best_move = possible_moves[0]
-            best_fitness = calculate_fitness(best_move[2], board_state)
-            print("Only one possible move available. Terminating.")
+    weights = range(len(sorted_moves), 0, -1)
+    return [move for move, _ in rng.choices(sorted_moves, weights=weights, k=num_selections)]
+
+# One point crossover of two gene sequences; sequences of one gene are copied
+def crossover(genes1, genes2, rng=random):
+    if len(genes1) < 2:
+        return genes1, genes2
+    point = rng.randint(1, len(genes1) - 1)
+    return genes1[:point] + genes2[point:], genes2[:point] + genes1[point:]
+
+# Replace each gene by a random one with probability mutation_rate
+def mutate(genes, mutation_rate=0.2, rng=random):
+    return tuple(rng.randrange(GENE_RANGE) if rng.random() < mutation_rate else gene for gene in genes)
+
+GENE_RANGE = 1 << 16  # a gene picks move gene % number of moves, so any value is legal
+WIN_BONUS = 1000  # fitness bonus when the opponent is left without a move
+
+# Population search over sequences of the AI's next `depth` moves. The
+# opponent answers every AI move with the reply that leaves the AI the lowest
+# fitness, so a sequence of genes always decodes to one line of play, scored by the
+# fitness of the position it ends in. Moves, replies and fitness are cached per
+# position, so each position's moves are generated once however many sequences
+# pass through it. Stops after `generations` generations or `time_budget`
+# seconds, whichever comes first, and returns the best first move as
+# (from, to, board) like generate_possible_moves.
+def genetic_algorithm_move(board_state, generations=20, population_size=24, depth=3,
+                           time_budget=None, mutation_rate=0.2, seed=None):
+    rng = random.Random(seed)
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    original = np.asarray(board_state)
+
+    root_boards, root_sources, root_targets = generate_moves_batch(original, 1)
+    if len(root_boards) == 0:
+        print("No possible moves available.")
+        return None
+    root_moves = [(tuple(source), tuple(target), board)
+                  for source, target, board in zip(root_sources.tolist(), root_targets.tolist(), root_boards)]
+    if len(root_moves) == 1:
+        return root_moves[0]
+
+    moves_cache = {original.tobytes(): root_boards}
+    replies = {}
+    fitness_cache = {}
+    sequences = {}
+
+    def ai_moves(board):
+        key = board.tobytes()
+        if key not in moves_cache:
+            moves_cache[key] = generate_moves_batch(board, 1)[0]
+        return moves_cache[key]
+
+    own_pieces = np.sum(original > 0)
+
+    def line_fitness(boards):
+        # calculate_fitness only looks at the AI's move, over several plies the
+        # pieces the AI lost (or kept by promoting them) count just as much
+        return calculate_fitness_batch(boards, original) + (np.sum(boards > 0, axis=(1, 2)) - own_pieces) * 10
+
+    def reply(board):
+        # The opponent's best answer by fitness, or None when it has no move
+        key = board.tobytes()
+        if key not in replies:
+            boards = generate_moves_batch(board, -1)[0]
+            replies[key] = boards[np.argmin(line_fitness(boards))] if len(boards) else None
+        return replies[key]
+
+    def fitness(board):
+        key = board.tobytes()
+        if key not in fitness_cache:
+            fitness_cache[key] = line_fitness(board[np.newaxis])[0]
+        return fitness_cache[key]
+
+    def play(genes):
+        # (fitness, index of the first move) for the line the genes decode to
+        board = original
+        indices = []
+        for gene in genes:
+            boards = ai_moves(board)
+            if len(boards) == 0:
+                return -WIN_BONUS, indices[0]
+            indices.append(gene % len(boards))
+            answer = reply(boards[indices[-1]])
+            if answer is None:
+                return fitness(boards[indices[-1]]) + WIN_BONUS, indices[0]
+            board = answer
+        return fitness(board), indices[0]
+
+    def score(genes):
+        if genes not in sequences:
+            sequences[genes] = play(genes)
+        return sequences[genes]
+
+    # Every first move starts in the population if there is room for it
+    population = [tuple([index] + [rng.randrange(GENE_RANGE) for _ in range(depth - 1)])
+                  for index in range(min(len(root_moves), population_size))]
+    while len(population) < population_size:
+        population.append(tuple(rng.randrange(GENE_RANGE) for _ in range(depth)))
+
+    best_fitness, best_index = max(score(genes) for genes in population)
+    for generation in range(generations):
+        if deadline is not None and time.perf_counter() >= deadline:
             break
-
-        # Calculate fitness for all possible moves
-        fitness_array = []
-        moves_with_fitness = []
-
-        for move in possible_moves:
-            fitness = calculate_fitness(move[2], board_state)
-            fitness_array.append(fitness)
-            moves_with_fitness.append((move, fitness))
-
-        # Select 2 moves with the highest fitness using rank selection
-        selected_population_1 = rank_selection(moves_with_fitness, 2)
-
-        # Extract indices of the selected moves
-        selected_indices = []
-        for move in selected_population_1:
-            index = possible_moves.index(move)
-            selected_indices.append(index)
-
-        # Convert indices to binary
-        max_index = len(possible_moves) - 1
-        bit_length = len(bin(max_index)[2:])  # Determine the number of bits needed
-        binary_indices = [bin(index)[2:].zfill(bit_length) for index in selected_indices]
-
-        # Perform crossover and mutation
-        while True:
-            offspring1, offspring2 = crossover_binary(binary_indices[0], binary_indices[1])
-            offspring1 = mutate_binary(offspring1)
-            offspring2 = mutate_binary(offspring2)
-
-            offspring_indices = [int(offspring1, 2), int(offspring2, 2)]
-            if all(index <= max_index for index in offspring_indices):
-                break
-
-        # Generate offspring moves from indices
-        offspring_moves = [possible_moves[index] for index in offspring_indices]
-
-        # Evaluate the fitness of the offspring
-        for move in offspring_moves:
-            fitness = calculate_fitness(move[2], board_state)
-            if fitness > best_fitness:
-                best_fitness = fitness
-                best_move = move
-
-    return best_move
+        scored = [(genes, score(genes)[0]) for genes in population]
+        elite = [genes for genes, _ in sorted(scored, key=lambda x: x[1], reverse=True)[:2]]
+        parents = rank_selection(scored, population_size - len(elite), rng)
+        children = []
+        for first, second in zip(parents[::2], parents[1::2] + parents[:1]):
+            for child in crossover(first, second, rng):
+                children.append(mutate(child, mutation_rate, rng))
+        population = elite + children[:population_size - len(elite)]
+        best_fitness, best_index = max((best_fitness, best_index), max(score(genes) for genes in population))
+
+    return root_moves[best_index]
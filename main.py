@@ -1,14 +1,46 @@
 import pygame
+import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
 import numpy as np
 from checkers.constants import WIDTH, HEIGHT, SQUARE_SIZE, RED, WHITE
 from checkers.game import Game
-from minmax.algorithm import minimax
+from minmax.algorithm import timed_minimax, ponder, load_tablebase, load_opening_book
 from checkers.board import Board
+from checkers.evaluation import load_weights
 from genetic.genetic_algo import genetic_algorithm_move  # Import the genetic algorithm function
 
 FPS = 60
 
+# Seconds the AI may think per move at each difficulty
+EASY_TIME = 0.3
+MEDIUM_TIME = 1.0
+HARD_TIME = 2.5
+
+# Let the minimax AI keep searching while the player thinks about their move
+PONDERING = True
+
+# Print the search statistics of every minimax move
+LOG_SEARCH_STATS = False
+
+# Built with `python -m minmax.tablebase`; the AI plays without it if it is missing
+TABLEBASE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'endgame.tb')
+if os.path.exists(TABLEBASE_FILE):
+    load_tablebase(TABLEBASE_FILE)
+
+# Built with `python -m minmax.book`; without it the AI searches from the first move
+OPENING_BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opening.book')
+if os.path.exists(OPENING_BOOK_FILE):
+    load_opening_book(OPENING_BOOK_FILE)
+
+# Evaluation weights, edit to tune the AI without touching the code; the
+# built-in defaults are used if the file is missing
+EVAL_WEIGHTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'eval_weights.json')
+if os.path.exists(EVAL_WEIGHTS_FILE):
+    load_weights(EVAL_WEIGHTS_FILE)
+
 # Initialize Pygame and its font module
 pygame.init()
 pygame.font.init()
@@ -21,6 +53,9 @@ TOTAL_WIDTH = WIDTH + MOVE_WIDTH
 WIN = pygame.display.set_mode((TOTAL_WIDTH, HEIGHT))
 pygame.display.set_caption('Checker Board')
 
+# The AI thinks on a worker thread so the window keeps drawing and handling events
+ai_executor = ThreadPoolExecutor(max_workers=1)
+
 # Create surfaces for the game and move count sections
 game_surface = pygame.Surface((WIDTH, HEIGHT))
 move_surface = pygame.Surface((MOVE_WIDTH, HEIGHT))
@@ -237,21 +272,21 @@ def difficulty_menu(selected_algorithm):
                     pygame.display.flip()
                     pygame.time.wait(200)  # Wait for a short duration to show the effect
                     menu = False
-                    main(3, selected_algorithm)  # Start game with easy difficulty
+                    main(EASY_TIME, selected_algorithm)  # Start game with easy difficulty
                 elif medium_button.collidepoint(event.pos):
                     pygame.draw.rect(WIN, (255, 255, 255), medium_button)  # Set button to white when clicked
                     draw_text(WIN, 'Medium', font_small, (0, 200, 0), medium_button)  # Green text
                     pygame.display.flip()
                     pygame.time.wait(200)  # Wait for a short duration to show the effect
                     menu = False
-                    main(4, selected_algorithm)  # Start game with medium difficulty
+                    main(MEDIUM_TIME, selected_algorithm)  # Start game with medium difficulty
                 elif hard_button.collidepoint(event.pos):
                     pygame.draw.rect(WIN, (255, 255, 255), hard_button)  # Set button to white when clicked
                     draw_text(WIN, 'Hard', font_small, (0, 200, 0), hard_button)  # Green text
                     pygame.display.flip()
                     pygame.time.wait(200)  # Wait for a short duration to show the effect
                     menu = False
-                    main(5, selected_algorithm)  # Start game with hard difficulty
+                    main(HARD_TIME, selected_algorithm)  # Start game with hard difficulty
 
 def get_row_col_from_mouse(pos):
     x, y = pos
@@ -259,23 +294,36 @@ def get_row_col_from_mouse(pos):
     col = x // SQUARE_SIZE
     return row, col
 
-def display_moves(game, font, font_small):
-    move_surface.fill((50, 50, 50))  # Background color for move count section
-    player_moves_text = f"Player Moves: {game.player_moves}"
-    ai_moves_text = f"AI Moves: {game.ai_moves}"
-    player_moves_surface = font.render(player_moves_text, True, (255, 255, 255))
-    ai_moves_surface = font.render(ai_moves_text, True, (255, 255, 255))
-    move_surface.blit(player_moves_surface, (20, 50))
-    move_surface.blit(ai_moves_surface, (20, 100))
-    
+def display_moves(game, font, font_small, thinking=False, drawn_state=None):
+    # Returns the panel's state and whether it was redrawn; nothing is drawn
+    # when the state matches drawn_state, the one returned last frame
+    dots = '.' * (pygame.time.get_ticks() // 400 % 4) if thinking else None  # Animate so it is clear the window is alive
+
     # Define button dimensions and positions
     button_width = 200
     button_height = 60
     return_button = pygame.Rect(50, HEIGHT - 150, button_width, button_height)
     restart_button = pygame.Rect(50, HEIGHT - 70, button_width, button_height)
     
-    # Get mouse position
+    # Get mouse position relative to the panel
     mouse_pos = pygame.mouse.get_pos()
+    mouse_pos = (mouse_pos[0] - WIDTH, mouse_pos[1])
+
+    state = (game.player_moves, game.ai_moves, dots,
+             return_button.collidepoint(mouse_pos), restart_button.collidepoint(mouse_pos))
+    if state == drawn_state:
+        return state, False
+
+    move_surface.fill((50, 50, 50))  # Background color for move count section
+    player_moves_text = f"Player Moves: {game.player_moves}"
+    ai_moves_text = f"AI Moves: {game.ai_moves}"
+    player_moves_surface = font.render(player_moves_text, True, (255, 255, 255))
+    ai_moves_surface = font.render(ai_moves_text, True, (255, 255, 255))
+    move_surface.blit(player_moves_surface, (20, 50))
+    move_surface.blit(ai_moves_surface, (20, 100))
+    if thinking:
+        thinking_surface = font.render(f"AI thinking{dots}", True, (255, 255, 0))
+        move_surface.blit(thinking_surface, (20, 150))
     
     # Check if mouse is over the return button
     if return_button.collidepoint(mouse_pos):
@@ -299,12 +347,33 @@ def display_moves(game, font, font_small):
 
     draw_text(move_surface, 'Return', font_small, return_text_color, return_button)  # Return button text
     draw_text(move_surface, 'Restart', font_small, restart_text_color, restart_button)  # Restart button text
+    return state, True
+
+def compute_ai_move(board, difficulty, algorithm, stop, log_stats=False):
+    # Runs on the worker thread with its own copy of the board
+    if algorithm == 'alpha_minimax':
+        if log_stats:
+            value, new_board, stats = timed_minimax(board, difficulty, True, None, stop=stop, stats=True)
+            print(f"AI move {value}: {stats}")
+        else:
+            value, new_board = timed_minimax(board, difficulty, True, None, stop=stop)
+    elif algorithm == 'genetic':
+        board_array = board.to_array()
+        best_move = genetic_algorithm_move(board_array)
+        new_board = Board()
+        new_board.from_array(best_move[2])  # Update the board with the best move
+    return new_board
 
-def main(difficulty=3, algorithm='alpha_minimax'):
+def main(difficulty=EASY_TIME, algorithm='alpha_minimax', pondering=PONDERING, log_stats=LOG_SEARCH_STATS):
     run = True
     clock = pygame.time.Clock()
     board = Board()
     game = Game(game_surface)
+    ai_future = None
+    ai_stop = None
+    ponder_future = None
+    ponder_stop = None
+    panel_state = None
     
     # Font for the move count section and buttons
     font = pygame.font.Font(None, 36)
@@ -313,14 +382,21 @@ def main(difficulty=3, algorithm='alpha_minimax'):
     while run:
         clock.tick(FPS)
 
-        if game.turn == WHITE:
-            if algorithm == 'alpha_minimax':
-                value, new_board = minimax(game.get_board(), difficulty, float('-inf'), float('inf'), True, game)
-            elif algorithm == 'genetic':
-                board_array = game.get_board().to_array()  # Assuming you have a to_array method in Board
-                best_move = genetic_algorithm_move(board_array)
-                new_board = Board()  # Assuming you have a method to create a Board from an array
-                new_board.from_array(best_move[2])  # Update the board with the best move
+        if pondering and algorithm == 'alpha_minimax' and game.turn == RED and ponder_future is None:
+            ponder_stop = threading.Event()
+            ponder_future = ai_executor.submit(ponder, deepcopy(game.get_board()), False, ponder_stop)
+        if ponder_future is not None and game.turn != RED:
+            # The player has moved; what the ponder search found stays in the transposition table
+            ponder_stop.set()
+            ponder_future = None
+
+        if game.turn == WHITE and ai_future is None:
+            # The search makes and unmakes moves on the board it gets, so it must not be the one on screen
+            ai_stop = threading.Event()
+            ai_future = ai_executor.submit(compute_ai_move, deepcopy(game.get_board()), difficulty, algorithm, ai_stop, log_stats)
+        if ai_future is not None and ai_future.done():
+            new_board = ai_future.result()
+            ai_future = None
             game.ai_move(new_board)
 
         winner = game.winner()
@@ -331,6 +407,10 @@ def main(difficulty=3, algorithm='alpha_minimax'):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 run = False
+            if event.type == pygame.WINDOWEXPOSED:
+                # The window contents may be gone, draw everything again
+                game.renderer.invalidate()
+                panel_state = None
             if event.type == pygame.MOUSEBUTTONDOWN:
                 pos = pygame.mouse.get_pos()
                 # Define button dimensions and positions
@@ -339,22 +419,40 @@ def main(difficulty=3, algorithm='alpha_minimax'):
                 return_button = pygame.Rect(WIDTH + 50, HEIGHT - 150, button_width, button_height)
                 restart_button = pygame.Rect(WIDTH + 50, HEIGHT - 70, button_width, button_height)
                 if return_button.collidepoint(pos):
+                    if ai_future is not None:
+                        ai_stop.set()  # Abandon the search, its result is no longer wanted
+                    if ponder_future is not None:
+                        ponder_stop.set()
                     main_menu()  # Call the main menu
                     return
                 if restart_button.collidepoint(pos):
+                    if ai_future is not None:
+                        ai_stop.set()
+                        ai_future = None
+                    if ponder_future is not None:
+                        ponder_stop.set()
+                        ponder_future = None
                     game.reset()
-                if pos[0] < WIDTH:  # Ensure clicks are within the game board area
+                if pos[0] < WIDTH and ai_future is None:  # Ensure clicks are within the game board area
                     row, col = get_row_col_from_mouse(pos)
                     game.select(row, col)
 
-        game.update()
-        display_moves(game, font, font_small)
-        
-        # Blit the game surface and move count surface onto the main window
-        WIN.blit(game_surface, (0, 0))
-        WIN.blit(move_surface, (WIDTH, 0))
-        pygame.display.flip()
+        # Only the squares and panel that changed are copied to the window and presented
+        dirty = game.update()
+        for rect in dirty:
+            WIN.blit(game_surface, rect, rect)
+        panel_state, panel_changed = display_moves(game, font, font_small, ai_future is not None, panel_state)
+        if panel_changed:
+            WIN.blit(move_surface, (WIDTH, 0))
+            dirty.append(pygame.Rect(WIDTH, 0, MOVE_WIDTH, HEIGHT))
+        if dirty:
+            pygame.display.update(dirty)
     
+    if ai_future is not None:
+        ai_stop.set()
+    if ponder_future is not None:
+        ponder_stop.set()
+    ai_executor.shutdown(wait=True)
     pygame.quit()
 
 main_menu()
@@ -1,53 +1,335 @@
-
 from copy import deepcopy
-import pygame
+import time
+from checkers.constants import RED, WHITE
+from checkers import zobrist
+from .transposition import TranspositionTable, EXACT, LOWER, UPPER
+from .ordering import MoveOrdering, move_key, capture_gain
+from .stats import SearchStats
+from .tablebase import Tablebase, WIN, LOSS
+
+# Shared between moves so positions reached again by transposition or on the
+# next turn are already known
+transposition_table = TranspositionTable()
+
+MAX_DEPTH = 30
+
+# At depth 0 the search goes on along captures until the position is quiet,
+# at most this many plies deep and this many nodes for every depth 0 node
+QUIESCENCE_PLIES = 8
+QUIESCENCE_NODES = 200
+
+# Endgame tablebase probed during search, see load_tablebase
+tablebase = None
+# Worth more than any material balance, so a known win is always preferred
+TABLEBASE_WIN = 100
+# A finished game is worth more than a tablebase result, so the search takes
+# an actual win over a known one; less for every ply, so it wins sooner
+GAME_WIN = 1000
+
+def load_tablebase(path):
+    global tablebase
+    tablebase = Tablebase(path)
+    return tablebase
+
+# Opening book consulted before searching, see load_opening_book
+opening_book = None
+
+def load_opening_book(path):
+    global opening_book
+    from .book import OpeningBook
+    opening_book = OpeningBook(path)
+    return opening_book
+
+class SearchTimeout(Exception):
+    pass
+
+class SearchLimits:
+    # Checking the clock every node is measurable, so only do it every few hundred
+    CHECK_EVERY = 256
+
+    def __init__(self, time_budget=None, node_budget=None, stop=None):
+        self.deadline = None if time_budget is None else time.perf_counter() + time_budget
+        self.node_budget = node_budget
+        # Anything with is_set(), e.g. a threading.Event set by the UI to cancel
+        self.stop = stop
+        self.nodes = 0
+
+    def tick(self):
+        self.nodes += 1
+        if self.node_budget is not None and self.nodes > self.node_budget:
+            raise SearchTimeout()
+        if self.nodes % self.CHECK_EVERY == 0:
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise SearchTimeout()
+            if self.stop is not None and self.stop.is_set():
+                raise SearchTimeout()
+
+# With stats=True both return (evaluation, board, SearchStats) instead of (evaluation, board)
+
+def minimax(position, depth, alpha, beta, max_player, game, table=None, ordering=None, stats=False):
+    if table is None:
+        table = transposition_table
+    if ordering is None:
+        ordering = MoveOrdering()
+    search_stats = SearchStats() if stats else None
+    table.new_search()
+    start = time.perf_counter()
+    evaluation, move = search(position, depth, alpha, beta, max_player, table, 0, None, ordering, search_stats)
+    if search_stats is not None:
+        search_stats.iterations.append((depth, time.perf_counter() - start, search_stats.nodes))
+    return _result(position, evaluation, move, search_stats)
+
+def timed_minimax(position, time_budget, max_player, game, node_budget=None, table=None, ordering=None, stop=None,
+                  stats=False):
+    search_stats = SearchStats() if stats else None
+    if opening_book is not None:
+        move = opening_book.choose(position, WHITE if max_player else RED)
+        if move is not None:
+            return _result(position, position.evaluate(), move, search_stats)
+    if table is None:
+        table = transposition_table
+    evaluation, move, depth = iterative_deepening(position, max_player, time_budget, node_budget,
+                                                  table=table, ordering=ordering, stop=stop, stats=search_stats)
+    return _result(position, evaluation, move, search_stats)
+
+def _result(position, evaluation, move, stats):
+    new_board = position if move is None else apply_move(position, move)
+    if stats is None:
+        return evaluation, new_board
+    return evaluation, new_board, stats
 
-RED = (255, 0, 0)
-WHITE = (255, 255, 255)
+def ponder(position, max_player, stop, table=None):
+    # Search the opponent's position until stopped. The result itself is thrown
+    # away; what matters is the transposition table it leaves behind, which
+    # already holds the positions after each of the opponent's replies.
+    if table is None:
+        table = transposition_table
+    return iterative_deepening(position, max_player, table=table, stop=stop)
 
-def minimax(position, depth, alpha, beta, max_player, game):
-    if depth == 0 or position.winner() is not None:
-        return position.evaluate(), position
+def iterative_deepening(position, max_player, time_budget=None, node_budget=None, max_depth=MAX_DEPTH,
+                        table=None, ordering=None, stop=None, stats=None):
+    # Depth 1 always runs to completion so there is a move to play even on a tiny budget
+    if ordering is None:
+        ordering = MoveOrdering()
+    if table is not None:
+        table.new_search()
+    start = time.perf_counter()
+    evaluation, move = search(position, 1, float('-inf'), float('inf'), max_player, table, 0, None, ordering, stats)
+    completed = 1
+    if stats is not None:
+        stats.iterations.append((1, time.perf_counter() - start, stats.nodes))
+    limits = SearchLimits(time_budget, node_budget, stop)
+    for depth in range(2, max_depth + 1):
+        if move is None:
+            break
+        # The next iteration costs several times the last one, don't start what can't finish
+        if time_budget is not None and time.perf_counter() - start > time_budget / 2:
+            break
+        iteration_start = time.perf_counter()
+        nodes = 0 if stats is None else stats.nodes
+        try:
+            result = search(position, depth, float('-inf'), float('inf'), max_player, table, 0, limits, ordering, stats)
+        except SearchTimeout:
+            break
+        evaluation, move = result
+        completed = depth
+        if stats is not None:
+            stats.iterations.append((depth, time.perf_counter() - iteration_start, stats.nodes - nodes))
+    return evaluation, move, completed
+
+def search(position, depth, alpha, beta, max_player, table=None, ply=0, limits=None, ordering=None, stats=None):
+    # Moves are made and unmade on position itself, so it is unchanged on return,
+    # even when limits abort the search with SearchTimeout
+    if depth == 0:
+        # quiesce counts the node itself and probes the tablebase too
+        return quiesce(position, alpha, beta, max_player, ply, QUIESCENCE_PLIES, [QUIESCENCE_NODES], limits, stats), None
+    if limits is not None:
+        limits.tick()
+    if stats is not None:
+        stats.nodes += 1
+        if ply > stats.max_ply:
+            stats.max_ply = ply
+    winner = position.winner(WHITE if max_player else RED)
+    if winner is not None:
+        if stats is not None:
+            stats.leaf_evals += 1
+        return game_over_score(winner, ply), None
+    if tablebase is not None and ply > 0:
+        score = probe_tablebase(position, max_player)
+        if score is not None:
+            return score, None
+
+    key = zobrist.position_key(position.hash, WHITE if max_player else RED)
+    tt_move = None
+    entry = table.probe(key) if table is not None else None
+    if entry is not None:
+        if stats is not None:
+            stats.tt_hits += 1
+        tt_move = entry[4]
+        # The root always searches so there is a move to return
+        if ply > 0 and entry[1] >= depth:
+            score, flag = entry[2], entry[3]
+            if flag == EXACT:
+                return score, None
+            if flag == LOWER:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if beta <= alpha:
+                return score, None
+    alpha_start, beta_start = alpha, beta
 
     if max_player:
         maxEval = float('-inf')
         best_move = None
-        for move in get_all_moves(position, WHITE, game):
-            evaluation = minimax(move, depth-1, alpha, beta, False, game)[0]
+        if ordering is not None:
+            moves = ordering.ordered_moves(position, WHITE, tt_move, ply)
+        else:
+            moves = iter_moves(position, WHITE)
+        for index, move in enumerate(moves):
+            undo = position.make_move(*move)
+            try:
+                evaluation = search(position, depth-1, alpha, beta, False, table, ply+1, limits, ordering, stats)[0]
+            finally:
+                position.unmake_move(undo)
             if evaluation > maxEval:
                 maxEval = evaluation
                 best_move = move
             alpha = max(alpha, evaluation)
             if beta <= alpha:
+                if ordering is not None:
+                    ordering.cutoff(move, WHITE, depth, ply)
+                if stats is not None:
+                    stats.cutoffs += 1
+                    if index == 0:
+                        stats.first_move_cutoffs += 1
                 break
-        return maxEval, best_move
+        best = maxEval
     else:
         minEval = float('inf')
         best_move = None
-        for move in get_all_moves(position, RED, game):
-            evaluation = minimax(move, depth-1, alpha, beta, True, game)[0]
+        if ordering is not None:
+            moves = ordering.ordered_moves(position, RED, tt_move, ply)
+        else:
+            moves = iter_moves(position, RED)
+        for index, move in enumerate(moves):
+            undo = position.make_move(*move)
+            try:
+                evaluation = search(position, depth-1, alpha, beta, True, table, ply+1, limits, ordering, stats)[0]
+            finally:
+                position.unmake_move(undo)
             if evaluation < minEval:
                 minEval = evaluation
                 best_move = move
             beta = min(beta, evaluation)
             if beta <= alpha:
+                if ordering is not None:
+                    ordering.cutoff(move, RED, depth, ply)
+                if stats is not None:
+                    stats.cutoffs += 1
+                    if index == 0:
+                        stats.first_move_cutoffs += 1
                 break
-        return minEval, best_move
-
-def simulate_move(piece, move, board, game, skip):
-    board.move(piece, move[0], move[1])
-    if skip:
-        board.remove(skip)
-    return board
-
-def get_all_moves(board, color, game):
-    moves = []
-    for piece in board.get_all_pieces(color):
-        valid_moves = board.get_valid_moves(piece)
-        for move, skip in valid_moves.items():
-            temp_board = deepcopy(board)
-            temp_piece = temp_board.get_piece(piece.row, piece.col)
-
-            new_board = simulate_move(temp_piece, move, temp_board, game, skip)
-            moves.append(new_board)
-    return moves
+        best = minEval
+
+    if stats is not None:
+        stats.expanded += 1
+        stats.children += index + 1
+    if table is not None:
+        if best <= alpha_start:
+            flag = UPPER
+        elif best >= beta_start:
+            flag = LOWER
+        else:
+            flag = EXACT
+        table.store(key, depth, best, flag, move_key(best_move))
+    return best, best_move
+
+def game_over_score(winner, ply):
+    # From WHITE's side, winner as Board.winner returns it; the other results
+    # are draws
+    if winner == WHITE:
+        return GAME_WIN - ply
+    if winner == RED:
+        return ply - GAME_WIN
+    return 0
+
+def probe_tablebase(position, max_player):
+    # Score of a position the tablebase covers, None for any other
+    result = tablebase.probe_board(position, WHITE if max_player else RED)
+    if result is None:
+        return None
+    # The result is for the side to move, scores are from WHITE's side
+    if result == WIN:
+        return (TABLEBASE_WIN if max_player else -TABLEBASE_WIN) + position.evaluate()
+    if result == LOSS:
+        return (-TABLEBASE_WIN if max_player else TABLEBASE_WIN) + position.evaluate()
+    return 0
+
+def quiesce(position, alpha, beta, max_player, ply, plies, budget, limits=None, stats=None):
+    # Captures are optional, so a side that has a move can stand pat on the
+    # static evaluation; only captures that improve on it are searched. A side
+    # with no moves cannot stand pat, its game is over, so winner() has to be
+    # checked before the stand-pat cutoff.
+    # budget is a one element list shared by the whole quiescence search below
+    # one depth 0 node.
+    if limits is not None:
+        limits.tick()
+    budget[0] -= 1
+    if stats is not None:
+        stats.nodes += 1
+        stats.quiescence_nodes += 1
+        stats.leaf_evals += 1
+        if ply > stats.max_ply:
+            stats.max_ply = ply
+    color = WHITE if max_player else RED
+    winner = position.winner(color)
+    if winner is not None:
+        return game_over_score(winner, ply)
+    if tablebase is not None and ply > 0:
+        score = probe_tablebase(position, max_player)
+        if score is not None:
+            return score
+    best = position.evaluate(color)
+    if plies == 0 or budget[0] <= 0:
+        return best
+
+    if max_player:
+        if best >= beta:
+            return best
+        alpha = max(alpha, best)
+    else:
+        if best <= alpha:
+            return best
+        beta = min(beta, best)
+
+    captures = [move for move in position.legal_moves(color) if move[3]]
+    captures.sort(key=lambda move: capture_gain(move[3]), reverse=True)
+    for move in captures:
+        if budget[0] <= 0:
+            break
+        undo = position.make_move(*move)
+        try:
+            evaluation = quiesce(position, alpha, beta, not max_player, ply+1, plies-1, budget, limits, stats)
+        finally:
+            position.unmake_move(undo)
+        if max_player:
+            best = max(best, evaluation)
+            alpha = max(alpha, evaluation)
+        else:
+            best = min(best, evaluation)
+            beta = min(beta, evaluation)
+        if beta <= alpha:
+            break
+    return best
+
+def iter_moves(board, color):
+    return iter(board.legal_moves(color))
+
+def apply_move(board, move):
+    piece, row, col, skip = move
+    new_board = deepcopy(board)
+    new_piece = new_board.get_piece(piece.row, piece.col)
+    new_skip = [new_board.get_piece(skipped.row, skipped.col) for skipped in skip]
+    new_board.make_move(new_piece, row, col, new_skip)
+    return new_board
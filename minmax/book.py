@@ -0,0 +1,149 @@
+"""Opening book built offline from self-play.
+
+Build with
+
+    python -m minmax.book --games 200 --plies 10 --depth 6 --output opening.book
+
+Every game starts from the initial position. For the first --plies moves
+each legal move is scored by a --depth search, one of the moves within
+--margin of the best is played at random, and the move is counted for the
+position. The file is a sorted array of fixed size records
+
+    position key (Zobrist hash and side to move), from row, from col,
+    to row, to col, weight
+
+so a lookup is a binary search over the mmapped file.
+"""
+import mmap
+import os
+import random
+import struct
+import sys
+
+from checkers import zobrist
+from checkers.board import Board
+from checkers.constants import RED, WHITE
+from .algorithm import search, iter_moves
+from .ordering import MoveOrdering, move_key
+from .transposition import TranspositionTable
+
+RECORD = struct.Struct('<Q4BH')
+MAX_WEIGHT = 0xFFFF
+
+
+class OpeningBook:
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        size = os.path.getsize(path)
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.records = size // RECORD.size
+
+    def close(self):
+        if self.data:
+            self.data.close()
+        self.file.close()
+
+    def _key_at(self, index):
+        return RECORD.unpack_from(self.data, index * RECORD.size)[0]
+
+    def lookup(self, key):
+        """[(from_row, from_col, to_row, to_col), weight] pairs stored for key."""
+        low, high = 0, self.records
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        moves = []
+        while low < self.records:
+            record = RECORD.unpack_from(self.data, low * RECORD.size)
+            if record[0] != key:
+                break
+            moves.append((record[1:5], record[5]))
+            low += 1
+        return moves
+
+    def choose(self, board, color, rng=random):
+        """A book move for color as (piece, row, col, skip), picked by weight, or None."""
+        moves = self.lookup(zobrist.position_key(board.hash, color))
+        if not moves:
+            return None
+        (from_row, from_col, row, col), _ = rng.choices(moves, weights=[weight for _, weight in moves])[0]
+        piece = board.get_piece(from_row, from_col)
+        if piece == 0 or piece.color != color:
+            return None
+        skip = board.get_valid_moves(piece).get((row, col))
+        if skip is None:
+            return None
+        return piece, row, col, skip
+
+
+def score_moves(board, color, depth, table):
+    # Every legal move with its score from the mover's point of view
+    max_player = color == WHITE
+    scored = []
+    for move in list(iter_moves(board, color)):
+        undo = board.make_move(*move)
+        evaluation = search(board, depth - 1, float('-inf'), float('inf'), not max_player, table, 1, None, MoveOrdering())[0]
+        board.unmake_move(undo)
+        scored.append((evaluation if max_player else -evaluation, move))
+    return scored
+
+
+def build(games, plies, depth, margin=0.0, seed=None, log=None):
+    rng = random.Random(seed)
+    table = TranspositionTable()
+    scores = {}
+    counts = {}
+    for game in range(games):
+        board = Board()
+        color = RED
+        for ply in range(plies):
+            if board.winner() is not None:
+                break
+            key = zobrist.position_key(board.hash, color)
+            if key not in scores:
+                scores[key] = [(score, move_key(move)) for score, move in score_moves(board, color, depth, table)]
+            scored = scores[key]
+            best = max(score for score, _ in scored)
+            chosen = rng.choice([move for score, move in scored if score >= best - margin])
+            position = counts.setdefault(key, {})
+            position[chosen] = position.get(chosen, 0) + 1
+
+            from_row, from_col, row, col = chosen
+            piece = board.get_piece(from_row, from_col)
+            board.make_move(piece, row, col, board.get_valid_moves(piece)[(row, col)])
+            color = WHITE if color == RED else RED
+        if log:
+            log('game %d/%d, %d positions' % (game + 1, games, len(counts)))
+    return counts
+
+
+def write(path, counts):
+    with open(path, 'wb') as out:
+        for key in sorted(counts):
+            for move, weight in sorted(counts[key].items(), key=lambda item: -item[1]):
+                out.write(RECORD.pack(key, *move, min(weight, MAX_WEIGHT)))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build an opening book from self-play.')
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--plies', type=int, default=10)
+    parser.add_argument('--depth', type=int, default=6)
+    parser.add_argument('--margin', type=float, default=0.0, help='play any move this close to the best score')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default='opening.book')
+    args = parser.parse_args()
+
+    counts = build(args.games, args.plies, args.depth, args.margin, args.seed,
+                   log=lambda line: print(line, file=sys.stderr))
+    write(args.output, counts)
+    print('wrote %s (%d positions, %d bytes)' % (args.output, len(counts), os.path.getsize(args.output)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+from checkers import evaluation
+
+KILLER_SLOTS = 2
+
+
+def move_key(move):
+    if move is None:
+        return None
+    piece, row, col, skip = move
+    return piece.row, piece.col, row, col
+
+
+def capture_gain(skip):
+    # Material taken, with the man and king values Board.evaluate uses
+    weights = evaluation.weights
+    return sum(weights['king'] if piece.king else weights['man'] for piece in skip)
+
+
+class MoveOrdering:
+    """Move ordering heuristics: killer moves and history scores.
+
+    Moves are tried in this order: the transposition table / principal
+    variation move, captures by material gained, the killer moves of the
+    current ply, then quiet moves by history score.
+    """
+
+    def __init__(self):
+        self.killers = []
+        self.history = {}
+
+    def ordered_moves(self, board, color, best_move, ply):
+        # Generated once per position and cached by the board, so the stored
+        # best move is tried first and the rest are only sorted when it
+        # doesn't cause a cutoff
+        moves = board.legal_moves(color)
+        if best_move is not None:
+            for index, move in enumerate(moves):
+                if move_key(move) == best_move:
+                    yield moves.pop(index)
+                    break
+        killers = self.killers[ply] if ply < len(self.killers) else []
+        moves.sort(key=lambda move: self._score(move, color, killers), reverse=True)
+        yield from moves
+
+    def _score(self, move, color, killers):
+        piece, row, col, skip = move
+        if skip:
+            return 2, capture_gain(skip)
+        key = (piece.row, piece.col, row, col)
+        if key in killers:
+            return 1, -killers.index(key)
+        return 0, self.history.get((color, key), 0)
+
+    def cutoff(self, move, color, depth, ply):
+        piece, row, col, skip = move
+        if skip:
+            return
+        key = (piece.row, piece.col, row, col)
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if key not in killers:
+            killers.insert(0, key)
+            del killers[KILLER_SLOTS:]
+        self.history[(color, key)] = self.history.get((color, key), 0) + depth * depth
@@ -0,0 +1,137 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from checkers.board import move_cache
+from checkers.constants import RED, WHITE
+from .algorithm import search, apply_move, game_over_score
+from .ordering import MoveOrdering
+from .transposition import TranspositionTable
+
+# Root-split search: every root move is searched by a worker process. The best
+# score found so far is shared between the workers as the alpha bound, so later
+# root moves are searched with a narrower window just like in the serial loop.
+#
+# Ties are broken the way the serial search breaks them (the earlier root move
+# wins), which is why a worker searching a move that comes before the current
+# best one lowers the bound by one ulp: a tie then still comes back as an exact
+# score instead of a fail-low.
+#
+# The bound is read once, when a worker starts on a root move. A move that is
+# already being searched keeps the window it started with even if another
+# worker raises the bound meanwhile, so it can spend nodes the serial search
+# would have cut.
+#
+# Every worker has its own transposition table. It and the move cache are
+# cleared on the first root move of every search, so a search gives the same
+# result whatever the pool searched before, like the serial search does with
+# a fresh table.
+
+_bound = None
+_table = None
+_search_id = None
+
+
+def _init_worker(bound):
+    global _bound, _table
+    _bound = bound
+    _table = TranspositionTable()
+
+
+def root_moves(position, max_player):
+    # Same order the serial search tries them in at the root with a fresh MoveOrdering
+    return list(MoveOrdering().ordered_moves(position, WHITE if max_player else RED, None, 0))
+
+
+def _search_root_move(position, index, depth, max_player, search_id):
+    global _search_id
+    if search_id != _search_id:
+        _search_id = search_id
+        _table.clear()
+        move_cache.clear()
+
+    # Scores are kept from the mover's point of view so both sides maximize
+    sign = 1 if max_player else -1
+    with _bound.get_lock():
+        best, best_index = _bound[0], int(_bound[1])
+    if best_index < 0:
+        floor = float('-inf')
+    elif best_index < index:
+        floor = best
+    else:
+        floor = math.nextafter(best, float('-inf'))
+
+    # position is this worker's own unpickled copy, so the move is never unmade
+    move = root_moves(position, max_player)[index]
+    position.make_move(*move)
+    if max_player:
+        value = search(position, depth - 1, floor, float('inf'), False, _table, 1, None, MoveOrdering())[0]
+    else:
+        value = search(position, depth - 1, float('-inf'), -floor, True, _table, 1, None, MoveOrdering())[0]
+    score = sign * value
+
+    if score > floor:
+        with _bound.get_lock():
+            if int(_bound[1]) < 0 or score > _bound[0] or (score == _bound[0] and index < _bound[1]):
+                _bound[0] = score
+                _bound[1] = index
+    return index, score
+
+
+class ParallelSearch:
+    """A process pool that searches root moves in parallel.
+
+    The pool is kept between searches so workers are only started once,
+    but every search starts from empty transposition tables and move caches.
+    Use it as a context manager or call close() when done.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        # [best score from the mover's point of view, index of that root move]
+        self.bound = multiprocessing.Array('d', 2)
+        self.searches = 0
+        self.pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.bound,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+    def search(self, position, depth, max_player):
+        """Return (score, move) exactly like search() at the root, with the move
+        being one of position's own (piece, row, col, skip) tuples."""
+        color = WHITE if max_player else RED
+        winner = position.winner(color)
+        if winner is not None:
+            return game_over_score(winner, 0), None
+        if depth == 0:
+            return position.evaluate(color), None
+        moves = root_moves(position, max_player)
+
+        with self.bound.get_lock():
+            self.bound[0] = float('-inf')
+            self.bound[1] = -1
+        self.searches += 1
+
+        # Young brothers wait: the first move sets the bound before the rest start
+        results = [self.pool.submit(_search_root_move, position, 0, depth, max_player,
+                                    self.searches).result()]
+        futures = [self.pool.submit(_search_root_move, position, index, depth, max_player, self.searches)
+                   for index in range(1, len(moves))]
+        results.extend(future.result() for future in as_completed(futures))
+
+        index, score = max(results, key=lambda result: (result[1], -result[0]))
+        return (score if max_player else -score), moves[index]
+
+
+def parallel_minimax(position, depth, max_player, workers=None):
+    with ParallelSearch(workers) as parallel:
+        evaluation, move = parallel.search(position, depth, max_player)
+    if move is None:
+        return evaluation, position
+    return evaluation, apply_move(position, move)
@@ -0,0 +1,55 @@
+class SearchStats:
+    """Counters filled in by search() when one is passed to it.
+
+    Off by default: the search only pays for the counting when asked for it,
+    e.g. with minimax(..., stats=True). iterations holds (depth, seconds,
+    nodes) for every completed iteration, max_ply the deepest ply visited.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.quiescence_nodes = 0  # also counted in nodes
+        self.leaf_evals = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.tt_hits = 0
+        self.max_ply = 0
+        self.expanded = 0  # nodes whose moves were searched
+        self.children = 0  # moves searched at those nodes
+        self.iterations = []
+
+    @property
+    def depth(self):
+        return self.iterations[-1][0] if self.iterations else 0
+
+    @property
+    def seconds(self):
+        return sum(iteration[1] for iteration in self.iterations)
+
+    def first_move_cutoff_rate(self):
+        if not self.cutoffs:
+            return 0.0
+        return self.first_move_cutoffs / self.cutoffs
+
+    def branching_factor(self):
+        # Moves actually searched per expanded node, so cutoffs bring it down
+        if not self.expanded:
+            return 0.0
+        return self.children / self.expanded
+
+    def as_dict(self):
+        return {'nodes': self.nodes, 'quiescence_nodes': self.quiescence_nodes, 'leaf_evals': self.leaf_evals,
+                'cutoffs': self.cutoffs, 'first_move_cutoff_rate': self.first_move_cutoff_rate(), 'tt_hits': self.tt_hits,
+                'depth': self.depth, 'max_ply': self.max_ply, 'branching_factor': self.branching_factor(),
+                'seconds': self.seconds,
+                'iterations': [{'depth': depth, 'seconds': seconds, 'nodes': nodes}
+                               for depth, seconds, nodes in self.iterations]}
+
+    def __str__(self):
+        seconds = self.seconds
+        return ('depth %d (max ply %d), %d nodes (%d quiescence) in %.2fs (%.0f/s), %d leaf evals, '
+                '%d cutoffs (%.0f%% on first move), %d TT hits, branching factor %.2f, iterations %s' % (
+                    self.depth, self.max_ply, self.nodes, self.quiescence_nodes, seconds,
+                    self.nodes / seconds if seconds else 0, self.leaf_evals, self.cutoffs, 100 * self.first_move_cutoff_rate(), self.tt_hits,
+                    self.branching_factor(),
+                    ' '.join('%d:%.3fs' % (depth, seconds) for depth, seconds, nodes in self.iterations)))
@@ -0,0 +1,360 @@
+"""Endgame tablebases: win/loss/draw for every position with few pieces.
+
+Build with
+
+    python -m minmax.tablebase --pieces 3 --output endgame.tb
+
+The builder is pure Python: three pieces take a few seconds and four
+about four minutes. Every extra piece multiplies that by roughly thirty, so
+four is the practical limit; five or more pieces work but take hours. The
+builder keeps two bytes per position and side to move of the material
+being solved, plus a queue of the results still to push back.
+
+Positions are grouped by material (red men, red kings, white men, white
+kings). Inside a group each piece type's squares are ranked with the
+combinatorial number system, which gives every position a fixed index, and
+results are packed four to a byte for each side to move. The file is opened
+with mmap, so a probe is a few integer operations and one byte read and the
+table never has to fit in RAM.
+
+The rules are the ones Board.winner and Board.get_valid_moves use: a side
+without pieces or without moves has lost, captures are optional. Draws by
+repetition or the 30-move rule are not modelled, so DRAW means neither side
+can force a win.
+"""
+import itertools
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_right
+from math import comb
+
+from checkers.bitboard import BitBoard, SQUARES, BITS, UP, DOWN, PROMOTION, bits, shift
+from checkers.constants import RED, WHITE, ROWS
+
+DRAW, WIN, LOSS = 0, 1, 2  # for the side to move
+NO_LOSS = 0xFF  # a move counter that never runs out, see TablebaseBuilder.solve
+
+MAGIC = b'CKTB'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI')  # magic, version, max pieces, number of materials
+ENTRY = struct.Struct('<4BQQ')    # material, offset, positions per side
+
+SQUARE_BITS = [BITS[square] for square in SQUARES]
+DENSE = {bit: index for index, bit in enumerate(SQUARE_BITS)}
+N = len(SQUARE_BITS)
+
+# Men can't stand on the rank they promote on
+RED_MAN_SQUARES = [index for index, (row, col) in enumerate(SQUARES) if row != 0]
+WHITE_MAN_SQUARES = [index for index, (row, col) in enumerate(SQUARES) if row != ROWS - 1]
+
+# COMBS[k][square] is comb(square, k), increasing in square for k >= 1, and
+# GROUP_SIZE[k] the number of ways to place k pieces of one type
+COMBS = [[comb(square, k) for square in range(N)] for k in range(N + 1)]
+GROUP_SIZE = [comb(N, k) for k in range(N + 1)]
+# RANK_TERMS[k][bit] is what the k-th lowest square adds to a colex rank
+RANK_TERMS = [None] + [{bit: COMBS[k][square] for bit, square in DENSE.items()} for k in range(1, N + 1)]
+
+
+def rank(squares):
+    # Colex rank of a sorted tuple of dense square indices
+    return sum(comb(square, k + 1) for k, square in enumerate(squares))
+
+
+def unrank(value, pieces):
+    # The squares as a bit mask, inverse of rank
+    mask = 0
+    for k in range(pieces, 0, -1):
+        square = bisect_right(COMBS[k], value) - 1
+        value -= COMBS[k][square]
+        mask |= SQUARE_BITS[square]
+    return mask
+
+
+def mask_rank(mask):
+    # rank() of the mask's squares; the lowest bit is always the lowest square
+    value = 0
+    k = 1
+    while mask:
+        bit = mask & -mask
+        value += RANK_TERMS[k][bit]
+        mask ^= bit
+        k += 1
+    return value
+
+
+def material_of(position):
+    kings = position.kings
+    return (bin(position.red & ~kings).count('1'), bin(position.red & kings).count('1'),
+            bin(position.white & ~kings).count('1'), bin(position.white & kings).count('1'))
+
+
+def material_size(material):
+    size = 1
+    for pieces in material:
+        size *= GROUP_SIZE[pieces]
+    return size
+
+
+def position_index(position, material):
+    kings = position.kings
+    index = 0
+    for pieces, mask in zip(material, (position.red & ~kings, position.red & kings,
+                                       position.white & ~kings, position.white & kings)):
+        index = index * GROUP_SIZE[pieces] + mask_rank(mask)
+    return index
+
+
+def index_position(index, material):
+    # The BitBoard at index, inverse of position_index
+    masks = []
+    for pieces in reversed(material):
+        index, group = divmod(index, GROUP_SIZE[pieces])
+        masks.append(unrank(group, pieces))
+    white_kings, white_men, red_kings, red_men = masks
+    return BitBoard(red_men | red_kings, white_men | white_kings, red_kings | white_kings)
+
+
+def materials(max_pieces):
+    # Captures only ever lead to fewer pieces and promotions to fewer men, so
+    # building in this order means every successor outside the material being
+    # built is already known
+    found = []
+    for total in range(2, max_pieces + 1):
+        for red_men, red_kings, white_men, white_kings in itertools.product(range(total + 1), repeat=4):
+            if red_men + red_kings + white_men + white_kings != total:
+                continue
+            if red_men + red_kings == 0 or white_men + white_kings == 0:
+                continue
+            found.append((red_men, red_kings, white_men, white_kings))
+    return sorted(found, key=lambda material: (sum(material), material[0] + material[2]))
+
+
+def placements(material):
+    red_men, red_kings, white_men, white_kings = material
+    groups = [itertools.combinations(RED_MAN_SQUARES, red_men),
+              itertools.combinations(range(N), red_kings),
+              itertools.combinations(WHITE_MAN_SQUARES, white_men),
+              itertools.combinations(range(N), white_kings)]
+    for squares in itertools.product(*groups):
+        occupied = [square for group in squares for square in group]
+        if len(set(occupied)) != len(occupied):
+            continue
+        masks = [sum(SQUARE_BITS[square] for square in group) for group in squares]
+        index = 0
+        for pieces, group in zip(material, squares):
+            index = index * GROUP_SIZE[pieces] + rank(group)
+        yield index, BitBoard(masks[0] | masks[1], masks[2] | masks[3], masks[1] | masks[3])
+
+
+def terminal_value(position, color):
+    winner = position.winner()
+    if winner is None:
+        return None
+    return WIN if winner == color else LOSS
+
+
+class TablebaseBuilder:
+    def __init__(self, max_pieces, log=None):
+        self.max_pieces = max_pieces
+        self.log = log
+        self.results = {}
+
+    def value(self, position, color):
+        value = terminal_value(position, color)
+        if value is not None:
+            return value
+        material = material_of(position)
+        side = self.results[material][0 if color == RED else 1]
+        return side[position_index(position, material)]
+
+    def build(self):
+        for material in materials(self.max_pieces):
+            start = time.perf_counter()
+            self.results[material] = self.solve(material)
+            if self.log:
+                self.log('%s: %d positions per side in %.1fs' % (material, material_size(material),
+                                                                 time.perf_counter() - start))
+        return self.results
+
+    def solve(self, material):
+        """Retrograde analysis of one material.
+
+        Positions decided on their own are found first: finished games, and
+        positions whose moves out of this material (captures and promotions,
+        already solved) include a win or leave no other way. From there the
+        results are pushed back to the positions one quiet move earlier: a
+        parent of a lost position is won, and a parent loses once every one of
+        its moves has been found to lead to a won position. Whatever is never
+        reached is a draw.
+        """
+        size = material_size(material)
+        values = (bytearray(size), bytearray(size))
+        # Moves inside this material not yet known to lead to a WIN for the
+        # opponent, or NO_LOSS if a move out of it doesn't
+        remaining = (bytearray(size), bytearray(size))
+        queue = array('Q')  # index * 2 + side of the WIN and LOSS results to push back
+
+        for index, position in placements(material):
+            # Board.winner looks at RED's moves first, whoever is to move
+            if not position.has_moves(RED):
+                winner = WHITE
+            elif not position.has_moves(WHITE):
+                winner = RED
+            else:
+                winner = None
+            for side, color in enumerate((RED, WHITE)):
+                if winner is not None:
+                    value = WIN if winner == color else LOSS
+                else:
+                    value, inside = self.moves_out(position, color)
+                    if value is None:
+                        remaining[side][index] = inside
+                        continue
+                values[side][index] = value
+                if value != DRAW:
+                    queue.append(index * 2 + side)
+
+        while queue:
+            code = queue.pop()
+            index, side = code >> 1, code & 1
+            parent_side = 1 - side
+            parent_values, parent_remaining = values[parent_side], remaining[parent_side]
+            lost = values[side][index] == LOSS
+            for parent in parents(index_position(index, material), RED if parent_side == 0 else WHITE):
+                parent_index = position_index(parent, material)
+                if parent_values[parent_index] != DRAW:
+                    continue
+                if lost:
+                    parent_values[parent_index] = WIN
+                else:
+                    left = parent_remaining[parent_index]
+                    if left == NO_LOSS:
+                        continue
+                    parent_remaining[parent_index] = left - 1
+                    if left > 1:
+                        continue
+                    parent_values[parent_index] = LOSS
+                queue.append(parent_index * 2 + parent_side)
+        return values
+
+    def moves_out(self, position, color):
+        # (value, moves inside the material) for color to move, the value
+        # being None while the moves inside can still decide it
+        opponent = WHITE if color == RED else RED
+        inside = 0
+        can_lose = True
+        for move in position.get_moves(color):
+            source, target, captured = move
+            if not captured and (source & position.kings or not target & PROMOTION):
+                inside += 1
+                continue
+            result = self.value(position.move(move), opponent)
+            if result == LOSS:
+                return WIN, 0
+            if result != WIN:
+                can_lose = False
+        if not inside:
+            return (LOSS if can_lose else DRAW), 0
+        return None, (inside if can_lose else NO_LOSS)
+
+
+def parents(position, color):
+    # Positions color could have made a quiet move from, neither capturing
+    # nor promoting, to reach position
+    own = position.red if color == RED else position.white
+    empty = position.empty()
+    kings = own & position.kings
+    men = own & ~position.kings
+    for step in UP + DOWN:
+        forward = (step in UP) == (color == RED)
+        for target in bits(kings | men if forward else kings):
+            source = shift(target, -step) & empty
+            if not source:
+                continue
+            moved = source | target
+            if color == RED:
+                red, white = position.red ^ moved, position.white
+            else:
+                red, white = position.red, position.white ^ moved
+            yield BitBoard(red, white, position.kings ^ moved if target & kings else position.kings)
+
+
+def pack(values):
+    packed = bytearray((len(values) + 3) // 4)
+    for index, value in enumerate(values):
+        if value:
+            packed[index >> 2] |= value << ((index & 3) * 2)
+    return packed
+
+
+def write(path, max_pieces, results):
+    entries = []
+    offset = HEADER.size + ENTRY.size * len(results)
+    blobs = []
+    for material, (red, white) in results.items():
+        size = len(red)
+        entries.append(ENTRY.pack(*material, offset, size))
+        blob = pack(red) + pack(white)
+        blobs.append(blob)
+        offset += len(blob)
+    with open(path, 'wb') as out:
+        out.write(HEADER.pack(MAGIC, VERSION, max_pieces, len(results)))
+        out.writelines(entries)
+        out.writelines(blobs)
+
+
+class Tablebase:
+    """Read-only, memory-mapped view of a file written by the builder."""
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.max_pieces, count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('%s is not a version %d checkers tablebase' % (path, VERSION))
+        self.materials = {}
+        for number in range(count):
+            *material, offset, size = ENTRY.unpack_from(self.data, HEADER.size + number * ENTRY.size)
+            self.materials[tuple(material)] = (offset, size)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def probe(self, position, color):
+        """WIN, LOSS or DRAW for color to move in a BitBoard, or None if not covered."""
+        material = material_of(position)
+        found = self.materials.get(material)
+        if found is None:
+            return None
+        offset, size = found
+        index = position_index(position, material)
+        if color == WHITE:
+            index += size + (-size) % 4  # each side's block is padded to whole bytes
+        return (self.data[offset + (index >> 2)] >> ((index & 3) * 2)) & 3
+
+    def probe_board(self, board, color):
+        if board.red_left + board.white_left > self.max_pieces:
+            return None
+        return self.probe(BitBoard.from_board(board), color)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build an endgame tablebase.')
+    parser.add_argument('--pieces', type=int, default=3, help='largest number of pieces on the board')
+    parser.add_argument('--output', default='endgame.tb')
+    args = parser.parse_args()
+
+    builder = TablebaseBuilder(args.pieces, log=lambda line: print(line, file=sys.stderr))
+    write(args.output, args.pieces, builder.build())
+    print('wrote %s (%d bytes)' % (args.output, os.path.getsize(args.output)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Rough size of one stored entry (tuple, key, score and move) in CPython,
+# used to turn the memory budget into a number of slots.
+ENTRY_BYTES = 200
+
+
+class TranspositionTable:
+    """Fixed size hash table of search results.
+
+    Every bucket has two slots: a depth-preferred slot that is only
+    overwritten by an equal or deeper search, and an always-replace slot
+    that takes whatever the depth-preferred slot refused. Entries are
+    (key, depth, score, flag, move, generation) tuples where move is
+    (from_row, from_col, to_row, to_col) or None.
+
+    Call new_search() before every search: deep entries more than one
+    search old stay usable but no longer block the depth-preferred slot, so
+    the table keeps up as the game moves on while a ponder search still
+    helps the search right after it.
+    """
+
+    def __init__(self, size_mb=16):
+        self.buckets = max(1, size_mb * 1024 * 1024 // (ENTRY_BYTES * 2))
+        self.clear()
+
+    def clear(self):
+        self.deep = [None] * self.buckets
+        self.recent = [None] * self.buckets
+        self.generation = 0
+        self.hits = 0
+        self.stores = 0
+
+    def new_search(self):
+        self.generation += 1
+
+    def probe(self, key):
+        index = key % self.buckets
+        entry = self.deep[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        entry = self.recent[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        index = key % self.buckets
+        entry = (key, depth, score, flag, move, self.generation)
+        self.stores += 1
+        current = self.deep[index]
+        if current is None or current[0] == key or depth >= current[1] or current[5] < self.generation - 1:
+            self.deep[index] = entry
+        else:
+            self.recent[index] = entry
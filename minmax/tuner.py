@@ -0,0 +1,204 @@
+"""Evolve evaluation weights by self-play.
+
+Run with
+
+    python -m minmax.tuner --generations 20 --population 16 --games 6 --output tuned_weights.json
+
+Every genome is a set of the weights in checkers.evaluation. Its fitness is
+the score it makes against the reference weights (--start, the defaults if
+not given) over --games random openings, each played once with either
+colour, 1 for a win and 0.5 for a draw. The same openings are used for every
+genome and the reference never changes, so a genome's fitness is only ever
+computed once and is kept in the cache.
+
+Games are played by headless searches in a process pool. After every
+generation the population and the cache go to --checkpoint and the best
+weights so far to --output, which main.py loads when saved as
+eval_weights.json. Running the same command again resumes from the
+checkpoint.
+"""
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from checkers import evaluation
+from checkers.board import Board
+from checkers.constants import RED, WHITE
+from .algorithm import iterative_deepening
+from .transposition import TranspositionTable
+
+TUNED = ['king', 'advancement', 'back_rank', 'center', 'tempo']
+
+
+def play_game(white, red, opening_seed, opening_plies, depth, max_plies):
+    """WHITE, RED or None for a draw, with each side searching with its own weights."""
+    rng = random.Random(opening_seed)
+    board = Board()
+    engines = {WHITE: (white, TranspositionTable(1)), RED: (red, TranspositionTable(1))}
+    color = RED
+    for ply in range(max_plies):
+        winner = board.winner(color)
+        if winner is not None:
+            return winner if winner in (RED, WHITE) else None
+        if ply < opening_plies:
+            move = rng.choice(board.legal_moves(color))
+        else:
+            weights, table = engines[color]
+            # Both sides share the board, so score it with the mover's weights
+            evaluation.set_weights(weights)
+            board.score = evaluation.score_board(board.board)
+            move = iterative_deepening(board, color == WHITE, max_depth=depth, table=table)[1]
+        board.make_move(*move)
+        color = WHITE if color == RED else RED
+    return None
+
+
+def _play(task):
+    genome, weights, reference, opening_seed, color, settings = task
+    if color == WHITE:
+        winner = play_game(weights, reference, opening_seed, *settings)
+    else:
+        winner = play_game(reference, weights, opening_seed, *settings)
+    return genome, 0.5 if winner is None else float(winner == color)
+
+
+class Tuner:
+    def __init__(self, reference, names=TUNED, population=16, games=6, depth=4, opening_plies=4,
+                 max_plies=150, seed=1, workers=None, checkpoint=None, log=None):
+        self.reference = dict(evaluation.DEFAULT_WEIGHTS, **reference)
+        self.names = list(names)
+        self.size = population
+        self.games = games
+        self.settings = (opening_plies, depth, max_plies)
+        self.seed = seed
+        self.workers = workers
+        self.checkpoint = checkpoint
+        self.log = log
+        self.generation = 0
+        self.population = []
+        self.cache = {}
+
+    def weights(self, genome):
+        return dict(self.reference, **dict(zip(self.names, genome)))
+
+    def _state(self):
+        # Everything a cached fitness depends on; a checkpoint with different
+        # settings is ignored rather than mixed in
+        return {'reference': self.reference, 'names': self.names, 'games': self.games,
+                'settings': list(self.settings), 'seed': self.seed}
+
+    def load(self):
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return False
+        with open(self.checkpoint) as checkpoint:
+            saved = json.load(checkpoint)
+        if saved['state'] != self._state():
+            if self.log:
+                self.log('%s was written with other settings, starting over' % self.checkpoint)
+            return False
+        self.generation = saved['generation']
+        self.population = [tuple(genome) for genome in saved['population']]
+        self.cache = {tuple(genome): fitness for genome, fitness in saved['cache']}
+        return True
+
+    def save(self):
+        if not self.checkpoint:
+            return
+        saved = {'state': self._state(), 'generation': self.generation,
+                 'population': [list(genome) for genome in self.population],
+                 'cache': [[list(genome), fitness] for genome, fitness in self.cache.items()]}
+        # Written next to it first, so an interrupted save keeps the old checkpoint
+        with open(self.checkpoint + '.tmp', 'w') as checkpoint:
+            json.dump(saved, checkpoint)
+        os.replace(self.checkpoint + '.tmp', self.checkpoint)
+
+    def mutate(self, genome, rng, scale=0.3):
+        values = []
+        for name, value in zip(self.names, genome):
+            value += rng.gauss(0, scale * max(abs(value), 0.05))
+            values.append(round(max(value, 1.0 if name == 'king' else 0.0), 3))
+        return tuple(values)
+
+    def initial_population(self):
+        rng = random.Random(self.seed)
+        start = tuple(round(self.reference[name], 3) for name in self.names)
+        population = [start]
+        while len(population) < self.size:
+            population.append(self.mutate(start, rng))
+        return population
+
+    def evaluate(self, pool):
+        genomes = [genome for genome in dict.fromkeys(self.population) if genome not in self.cache]
+        tasks = [(genome, self.weights(genome), self.reference, self.seed * 7919 + game, color, self.settings)
+                 for genome in genomes for game in range(self.games) for color in (WHITE, RED)]
+        totals = dict.fromkeys(genomes, 0.0)
+        for genome, score in pool.map(_play, tasks):
+            totals[genome] += score
+        for genome, total in totals.items():
+            self.cache[genome] = total / (2 * self.games)
+
+    def breed(self):
+        rng = random.Random(self.seed * 1000003 + self.generation)
+        ranked = sorted(dict.fromkeys(self.population), key=lambda genome: -self.cache[genome])
+        parents = ranked[:max(2, len(ranked) // 4)]
+        children = list(parents)
+        while len(children) < self.size:
+            first, second = rng.sample(parents, 2)
+            child = tuple(rng.choice(pair) for pair in zip(first, second))
+            children.append(self.mutate(child, rng))
+        return children
+
+    def best(self):
+        return max(self.cache, key=self.cache.get)
+
+    def run(self, generations, output=None):
+        if not self.load():
+            self.population = self.initial_population()
+        with ProcessPoolExecutor(self.workers) as pool:
+            while self.generation < generations:
+                self.evaluate(pool)
+                best = self.best()
+                if self.log:
+                    self.log('generation %d: best %.3f %s' % (self.generation + 1, self.cache[best],
+                                                               dict(zip(self.names, best))))
+                if output:
+                    evaluation.save_weights(output, self.weights(best))
+                self.generation += 1
+                self.population = self.breed()
+                self.save()
+        return self.weights(self.best())
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Evolve evaluation weights by self-play.')
+    parser.add_argument('--generations', type=int, default=20)
+    parser.add_argument('--population', type=int, default=16)
+    parser.add_argument('--games', type=int, default=6, help='openings per genome, each played with both colours')
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--opening-plies', type=int, default=4, help='random moves at the start of every game')
+    parser.add_argument('--max-plies', type=int, default=150, help='longer games count as draws')
+    parser.add_argument('--tune', nargs='+', default=TUNED, choices=sorted(evaluation.DEFAULT_WEIGHTS))
+    parser.add_argument('--start', help='weights file to start from and play against')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--checkpoint', default='tuner_checkpoint.json')
+    parser.add_argument('--output', default='tuned_weights.json')
+    args = parser.parse_args()
+
+    reference = {}
+    if args.start:
+        with open(args.start) as start:
+            reference = json.load(start)
+    tuner = Tuner(reference, args.tune, args.population, args.games, args.depth, args.opening_plies,
+                  args.max_plies, args.seed, args.workers, args.checkpoint,
+                  log=lambda line: print(line, file=sys.stderr))
+    weights = tuner.run(args.generations, args.output)
+    print('wrote %s: %s' % (args.output, json.dumps(weights)))
+
+
+if __name__ == '__main__':
+    main()